@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (needed by DataFrame.to_feather / pd.read_feather)
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Directory paths
+DATASETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'datasets')
+CACHE_DIR = os.path.join(DATASETS_DIR, '.cache')
+
+# Stored with every cache entry; bump it when read_csv_typed changes how a dataset is typed
+LOADER_VERSION = 2
+
+# Schema of every CSV in the datasets directory:
+#   integers   - parsed as numbers and downcast to the smallest int type (nullable Int* when values are missing)
+#   floats     - parsed as float64, bad values become NaN
+#   categories - low-cardinality strings stored as pandas categoricals
+#   strings    - free text kept as the pandas string dtype
+#   dates      - parsed with an explicit format, invalid dates become NaT
+DATASETS = {
+    'orders': {
+        'file': 'orders.csv',
+        'integers': ['order_id', 'customer_id', 'product_id'],
+        'floats': ['price'],
+        'categories': ['category', 'city', 'country'],
+        'strings': ['product_name'],
+        'dates': {'order_date': '%Y-%m-%d'},
+    },
+    'sales_data': {
+        'file': 'sales_data.csv',
+        'integers': ['Product_ID', 'Quantity'],
+        'floats': ['Revenue'],
+        'dates': {'Date': '%Y-%m-%d'},
+    },
+    'employees': {
+        'file': 'employees.csv',
+        'integers': ['EmployeeID', 'Age', 'Salary'],
+        'categories': ['Department'],
+        'strings': ['Name'],
+    },
+    'personal_info': {
+        'file': 'personal_info.csv',
+        'integers': ['Age'],
+        'categories': ['City'],
+        # Phone numbers start with '+' and would otherwise be read as integers
+        'strings': ['Name', 'Phone Number'],
+        'na_values': ['None', 'NA'],
+    },
+    'house_price': {
+        'file': 'house_price.csv',
+        'integers': ['price', 'size', 'bedrooms'],
+    },
+}
+
+
+def source_path(name):
+    return os.path.join(DATASETS_DIR, DATASETS[name]['file'])
+
+
+def file_hash(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def schema_hash(name):
+    # A cache entry is only valid for the schema and loader version that produced it
+    schema = json.dumps({'loader_version': LOADER_VERSION, 'schema': DATASETS[name]}, sort_keys=True)
+    return hashlib.sha256(schema.encode()).hexdigest()
+
+
+def downcast_integers(series):
+    values = pd.to_numeric(series, errors='coerce')
+    # Non-integral values are bad values like any other and become missing
+    values = values.where(values % 1 == 0)
+    if not values.isna().any():
+        return pd.to_numeric(values, downcast='integer')
+    # Missing values: pick the smallest width from the present values and use the nullable type
+    present = pd.to_numeric(values.dropna().astype('int64'), downcast='integer')
+    return values.astype(present.dtype.name.capitalize())
+
+
+def read_csv_typed(name):
+    ''' read a dataset from its CSV and apply the declared schema '''
+    schema = DATASETS[name]
+    read_dtypes = {column: 'category' for column in schema.get('categories', [])}
+    read_dtypes.update({column: 'string' for column in schema.get('strings', [])})
+    # Dates are read as strings so that invalid values can be coerced instead of failing
+    read_dtypes.update({column: 'string' for column in schema.get('dates', {})})
+    data = pd.read_csv(source_path(name), dtype=read_dtypes, na_values=schema.get('na_values'))
+
+    for column in schema.get('integers', []):
+        data[column] = downcast_integers(data[column])
+    for column in schema.get('floats', []):
+        data[column] = pd.to_numeric(data[column], errors='coerce').astype('float64')
+    for column, date_format in schema.get('dates', {}).items():
+        data[column] = pd.to_datetime(data[column], format=date_format, errors='coerce')
+    return data
+
+
+def _cache_paths(name):
+    return os.path.join(CACHE_DIR, f'{name}.feather'), os.path.join(CACHE_DIR, f'{name}.meta.json')
+
+
+def _cache_is_fresh(name):
+    cache_path, meta_path = _cache_paths(name)
+    if not (os.path.exists(cache_path) and os.path.exists(meta_path)):
+        return False
+    with open(meta_path, 'r') as file:
+        meta = json.load(file)
+    if meta.get('schema') != schema_hash(name):
+        return False
+    stat = os.stat(source_path(name))
+    if meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size:
+        return True
+
+    # The file was touched or copied; only the content hash decides whether it really changed
+    if meta['sha256'] != file_hash(source_path(name)):
+        return False
+    meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    with open(meta_path, 'w') as file:
+        json.dump(meta, file)
+    return True
+
+
+def _write_cache(name, data):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cache_path, meta_path = _cache_paths(name)
+    stat = os.stat(source_path(name))
+    data.to_feather(cache_path)
+    meta = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': file_hash(source_path(name)),
+            'schema': schema_hash(name)}
+    with open(meta_path, 'w') as file:
+        json.dump(meta, file)
+
+
+def load_dataset(name, use_cache=True):
+    ''' load a dataset by name with its declared dtypes, using the Feather cache when it is fresh '''
+    if name not in DATASETS:
+        raise KeyError(f"Unknown dataset '{name}'. Available datasets: {', '.join(DATASETS)}")
+    use_cache = use_cache and HAS_PYARROW
+    if use_cache and _cache_is_fresh(name):
+        return pd.read_feather(_cache_paths(name)[0])
+    data = read_csv_typed(name)
+    if use_cache:
+        _write_cache(name, data)
+    return data
+
+
+def clear_cache():
+    if not os.path.isdir(CACHE_DIR):
+        return
+    for filename in os.listdir(CACHE_DIR):
+        os.remove(os.path.join(CACHE_DIR, filename))
+
+
+def main():
+    # Compare default read_csv inference with the typed and cached loads
+    if not HAS_PYARROW:
+        print("pyarrow is not installed: datasets are typed but not cached.")
+    print(f"{'dataset':<15}{'default KB':>12}{'typed KB':>10}{'csv ms':>9}{'cached ms':>11}")
+    for name in DATASETS:
+        default = pd.read_csv(source_path(name))
+        load_dataset(name)  # make sure the cache exists
+
+        start_time = time.perf_counter()
+        read_csv_typed(name)
+        csv_ms = (time.perf_counter() - start_time) * 1000
+
+        start_time = time.perf_counter()
+        typed = load_dataset(name)
+        cached_ms = (time.perf_counter() - start_time) * 1000
+
+        default_kb = default.memory_usage(deep=True).sum() / 1024
+        typed_kb = typed.memory_usage(deep=True).sum() / 1024
+        print(f"{name:<15}{default_kb:>12.1f}{typed_kb:>10.1f}{csv_ms:>9.2f}{cached_ms:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
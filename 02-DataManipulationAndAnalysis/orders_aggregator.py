@@ -0,0 +1,163 @@
+import argparse
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+# Dimensions the order revenue is grouped by; 'month' is derived from order_date
+DIMENSIONS = ['category', 'city', 'country', 'month']
+VALUE_COLUMN = 'price'
+DATE_COLUMN = 'order_date'
+DATE_FORMAT = '%Y-%m-%d'
+
+BLOCK_SIZE = 64 * 1024 * 1024  # bytes of CSV parsed at a time inside one worker
+RANGES_PER_WORKER = 4
+
+
+def read_header(path):
+    with open(path, 'rb') as file:
+        return pd.read_csv(io.BytesIO(file.readline())).columns.tolist()
+
+
+def split_byte_ranges(path, parts):
+    ''' split the file body into roughly equal byte ranges '''
+    with open(path, 'rb') as file:
+        body_start = len(file.readline())
+    size = os.path.getsize(path)
+    step = max(1, (size - body_start) // parts)
+    bounds = list(range(body_start, size, step)) + [size]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def iter_range_blocks(path, start, end, block_size):
+    ''' yield blocks of whole lines whose first byte lies in [start, end) '''
+    with open(path, 'rb') as file:
+        file.seek(start)
+        position = start
+        # A line that starts before this range belongs to the previous range
+        if start > 0:
+            file.seek(start - 1)
+            position = start - 1 + len(file.readline())
+        lines = []
+        buffered = 0
+        while position < end:
+            line = file.readline()
+            if not line:
+                break
+            position += len(line)
+            lines.append(line)
+            buffered += len(line)
+            if buffered >= block_size:
+                yield b''.join(lines)
+                lines = []
+                buffered = 0
+        if lines:
+            yield b''.join(lines)
+
+
+def prepare(data):
+    ''' derive the grouping columns the same way for chunks and for the in-memory check '''
+    data[VALUE_COLUMN] = pd.to_numeric(data[VALUE_COLUMN], errors='coerce')
+    dates = pd.to_datetime(data[DATE_COLUMN], format=DATE_FORMAT, errors='coerce')
+    data['month'] = dates.dt.strftime('%Y-%m')
+    return data
+
+
+def partial_aggregate(data):
+    ''' mergeable partial aggregates: sum and non-null count of the value, and row count '''
+    partials = {}
+    for dimension in DIMENSIONS:
+        grouped = data.groupby(dimension, sort=False)[VALUE_COLUMN]
+        partials[dimension] = pd.DataFrame({
+            'revenue': grouped.sum(),
+            'priced': grouped.count(),
+            'orders': grouped.size(),
+        })
+    return partials
+
+
+def merge_partials(left, right):
+    if left is None:
+        return right
+    return {dimension: pd.concat([left[dimension], right[dimension]]).groupby(level=0).sum()
+            for dimension in DIMENSIONS}
+
+
+def aggregate_range(path, header, start, end, block_size):
+    ''' worker entry point: aggregate one byte range of the file block by block '''
+    result = None
+    for block in iter_range_blocks(path, start, end, block_size):
+        data = pd.read_csv(io.BytesIO(block), names=header, header=None,
+                           dtype={dimension: 'string' for dimension in DIMENSIONS if dimension in header})
+        result = merge_partials(result, partial_aggregate(prepare(data)))
+    return result
+
+
+def finalize(partials):
+    results = {}
+    for dimension, partial in partials.items():
+        result = partial.sort_index()
+        result.index.name = dimension
+        result['mean_price'] = result['revenue'] / result['priced'].where(result['priced'] > 0)
+        results[dimension] = result[['revenue', 'orders', 'mean_price']].astype({'orders': 'int64'})
+    return results
+
+
+def aggregate_orders(path, workers=os.cpu_count(), block_size=BLOCK_SIZE):
+    ''' aggregate revenue, order count and mean price per dimension without loading the file '''
+    header = read_header(path)
+    ranges = split_byte_ranges(path, workers * RANGES_PER_WORKER)
+    merged = None
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(aggregate_range, path, header, start, end, block_size)
+                   for start, end in ranges]
+        for future in as_completed(futures):
+            partial = future.result()
+            if partial is not None:
+                merged = merge_partials(merged, partial)
+    if merged is None:
+        merged = partial_aggregate(prepare(pd.DataFrame(columns=header)))
+    return finalize(merged)
+
+
+def aggregate_in_memory(path):
+    ''' reference implementation: plain pandas groupby on the whole file '''
+    data = prepare(pd.read_csv(path, dtype={dimension: 'string' for dimension in DIMENSIONS[:-1]}))
+    results = {}
+    for dimension in DIMENSIONS:
+        results[dimension] = data.groupby(dimension).agg(
+            revenue=(VALUE_COLUMN, 'sum'),
+            orders=(VALUE_COLUMN, 'size'),
+            mean_price=(VALUE_COLUMN, 'mean'),
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Out-of-core revenue aggregation for orders.csv-shaped files.')
+    parser.add_argument('path', nargs='?', default='datasets/orders.csv', help='orders CSV file')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--block-size', type=int, default=BLOCK_SIZE, help='bytes parsed per block')
+    parser.add_argument('--verify', action='store_true', help='compare against an in-memory pandas groupby')
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    results = aggregate_orders(args.path, args.workers, args.block_size)
+    elapsed = time.perf_counter() - start_time
+
+    for dimension, result in results.items():
+        print(f"\nRevenue by {dimension}:")
+        print(result.round(2).to_string())
+    print(f"\nAggregated {os.path.getsize(args.path)} bytes with {args.workers} workers in {elapsed:.2f}s")
+
+    if args.verify:
+        expected = aggregate_in_memory(args.path)
+        for dimension in DIMENSIONS:
+            pd.testing.assert_frame_equal(results[dimension], expected[dimension], check_index_type=False)
+        print("Results match pandas groupby.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import numpy as np
+
+# Prefix sums are kept per product over a dense day axis:
+#   cum[p, d] = total of product p over the first d days, with cum[p, 0] == 0
+# so any product x date-range total is cum[p, end + 1] - cum[p, start].
+# The last row holds the totals over all products.
+# Revenue is stored in integer cents so range sums are exact.
+QUANTITY = 0
+REVENUE = 1
+FIELDS = {'Quantity': QUANTITY, 'Revenue': REVENUE}
+INITIAL_CAPACITY = 32
+
+
+def to_day(date):
+    return np.datetime64(date, 'D')
+
+
+class SalesCube:
+    def __init__(self, dates, product_ids, quantities, revenues):
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        product_ids = np.asarray(product_ids)
+        if dates.size == 0:
+            raise ValueError('Cannot build a sales cube from an empty dataset')
+
+        self.start_date = dates.min()
+        self.num_days = int((dates.max() - self.start_date).astype(int)) + 1
+        self.product_ids = [int(product_id) for product_id in np.unique(product_ids)]
+        self._product_index = {product_id: index for index, product_id in enumerate(self.product_ids)}
+
+        capacity = max(INITIAL_CAPACITY, self.num_days)
+        self._cum = np.zeros((2, len(self.product_ids) + 1, capacity + 1), dtype=np.int64)
+
+        # Scatter each sale into its (product, day) cell, then accumulate along the day axis
+        rows = np.searchsorted(self.product_ids, product_ids)
+        days = (dates - self.start_date).astype(int) + 1
+        daily = self._cum[:, :, :self.num_days + 1]
+        np.add.at(daily[QUANTITY], (rows, days), np.asarray(quantities, dtype=np.int64))
+        np.add.at(daily[REVENUE], (rows, days), self._to_cents(revenues))
+        daily[:, -1, :] = daily[:, :-1, :].sum(axis=1)
+        np.cumsum(daily, axis=2, out=daily)
+
+    @classmethod
+    def from_csv(cls, path):
+        data = np.genfromtxt(path, delimiter=',', dtype=None, names=True, encoding='utf-8')
+        data = np.atleast_1d(data)
+        return cls(data['Date'], data['Product_ID'], data['Quantity'], data['Revenue'])
+
+    @staticmethod
+    def _to_cents(revenues):
+        return np.rint(np.asarray(revenues, dtype=np.float64) * 100).astype(np.int64)
+
+    @property
+    def end_date(self):
+        return self.start_date + np.timedelta64(self.num_days - 1, 'D')
+
+    def _row(self, product_id):
+        if product_id is None:
+            return -1
+        try:
+            return self._product_index[product_id]
+        except KeyError:
+            raise KeyError(f'Unknown product: {product_id}') from None
+
+    def _bounds(self, start_date, end_date):
+        ''' translate an inclusive date range into prefix-sum column indices, clipped to the cube '''
+        start = 0 if start_date is None else int((to_day(start_date) - self.start_date).astype(int))
+        end = self.num_days - 1 if end_date is None else int((to_day(end_date) - self.start_date).astype(int))
+        # Ranges outside the cube are empty; the spare capacity columns must never be read
+        start = min(max(start, 0), self.num_days)
+        end = min(end, self.num_days - 1)
+        return start, max(end + 1, start)
+
+    def _value(self, field, cents):
+        return cents / 100 if field == REVENUE else int(cents)
+
+    def range_total(self, product_id=None, start_date=None, end_date=None, field='Revenue'):
+        ''' O(1) total of one product (or all products when product_id is None) over an inclusive date range '''
+        field = FIELDS[field]
+        row = self._row(product_id)
+        start, end = self._bounds(start_date, end_date)
+        return self._value(field, self._cum[field, row, end] - self._cum[field, row, start])
+
+    def product_totals(self, start_date=None, end_date=None, field='Revenue'):
+        ''' totals of every product over a date range, as a {product_id: total} dict '''
+        field = FIELDS[field]
+        start, end = self._bounds(start_date, end_date)
+        totals = self._cum[field, :-1, end] - self._cum[field, :-1, start]
+        if field == REVENUE:
+            totals = totals / 100
+        return dict(zip(self.product_ids, totals.tolist()))
+
+    def moving_average(self, product_id=None, window=7, field='Revenue'):
+        ''' trailing moving average per day; the first days average over the days available so far '''
+        field = FIELDS[field]
+        row = self._row(product_id)
+        cum = self._cum[field, row, :self.num_days + 1]
+        ends = np.arange(1, self.num_days + 1)
+        starts = np.maximum(ends - window, 0)
+        averages = (cum[ends] - cum[starts]) / (ends - starts)
+        return averages / 100 if field == REVENUE else averages
+
+    def _ensure_capacity(self, num_days, num_products):
+        fields, rows, columns = self._cum.shape
+        if num_days + 1 <= columns and num_products + 1 <= rows:
+            return
+        capacity = columns - 1
+        while capacity < num_days:
+            capacity *= 2
+        grown = np.zeros((fields, num_products + 1, capacity + 1), dtype=np.int64)
+        used = self.num_days + 1
+        grown[:, :rows - 1, :used] = self._cum[:, :-1, :used]
+        grown[:, -1, :used] = self._cum[:, -1, :used]
+        self._cum = grown
+
+    def append_day(self, date, product_ids, quantities, revenues):
+        ''' add one day of sales without rebuilding; the date must not be earlier than end_date '''
+        date = to_day(date)
+        if date < self.end_date:
+            raise ValueError(f'Cannot append {date}: the cube already ends on {self.end_date}')
+        product_ids = [int(product_id) for product_id in np.atleast_1d(product_ids)]
+
+        # New products start with an all-zero history
+        new_products = sorted(set(product_ids) - set(self._product_index))
+        num_days = int((date - self.start_date).astype(int)) + 1
+        self._ensure_capacity(num_days, len(self.product_ids) + len(new_products))
+        for product_id in new_products:
+            self._product_index[product_id] = len(self.product_ids)
+            self.product_ids.append(product_id)
+
+        # Days without sales since the last one repeat the last prefix sum
+        last = self.num_days
+        self._cum[:, :, last + 1:num_days + 1] = self._cum[:, :, last:last + 1]
+        self.num_days = num_days
+
+        rows = np.array([self._product_index[product_id] for product_id in product_ids], dtype=np.intp)
+        quantities = np.atleast_1d(np.asarray(quantities, dtype=np.int64))
+        cents = np.atleast_1d(self._to_cents(revenues))
+        np.add.at(self._cum[QUANTITY, :, num_days], rows, quantities)
+        np.add.at(self._cum[REVENUE, :, num_days], rows, cents)
+        self._cum[QUANTITY, -1, num_days] += quantities.sum()
+        self._cum[REVENUE, -1, num_days] += cents.sum()
+
+
+if __name__ == "__main__":
+    cube = SalesCube.from_csv('./datasets/sales_data.csv')
+    print(f"Cube covers {cube.start_date} to {cube.end_date} for products {cube.product_ids}")
+    print("Total revenue:", cube.range_total())
+    print("Revenue per product:", cube.product_totals())
+    print("Product 1001 revenue 2022-01-01..2022-01-06:", cube.range_total(1001, '2022-01-01', '2022-01-06'))
+    print("3-day moving average revenue of product 1001:", cube.moving_average(1001, window=3))
+
+    cube.append_day('2022-01-12', [1001, 1006], [2, 7], [20.00, 70.00])
+    print(f"\nAfter appending 2022-01-12 the cube ends on {cube.end_date}")
+    print("Revenue per product:", cube.product_totals())
+    print("Quantity sold 2022-01-10..2022-01-12:", cube.range_total(None, '2022-01-10', '2022-01-12', field='Quantity'))
@@ -2,35 +2,54 @@ import pandas as pd
 import sqlite3
 import os
 
+from streams import CHUNK_SIZE, CsvSink, SqlSink, drain, map_items, read_csv, tee
+
+PRODUCT_SALES_PATH = 'transformed_data/product_sales.csv'
+CUSTOMER_SALES_PATH = 'transformed_data/customer_sales.csv'
+
 
 def extract_data():
-    # Read raw data files
+    # Products and customers are small lookup tables; sales are read lazily, one chunk at a time
     products = pd.read_csv('raw_data/products.csv')
-    sales = pd.read_csv('raw_data/sales.csv')
     customers = pd.read_csv('raw_data/customers.csv')
-    print("Data extraction completed.")
+    sales = read_csv('raw_data/sales.csv', CHUNK_SIZE)
+    print("Data extraction prepared.")
     return products, sales, customers
 
 
-def transform_data(products, sales, customers):
-
+def clean_sales(sales):
     # Ensure 'Quantity' column is of numeric type
     sales['Quantity'] = pd.to_numeric(sales['Quantity'], errors='coerce')
-    products['Price'] = pd.to_numeric(products['Price'], errors='coerce')
+    return sales
+
 
-    # Transform Product_Sales data
+def to_product_sales(sales, products):
     product_sales = sales.merge(products, on='ProductID')
     product_sales['TotalPrice'] = product_sales['Quantity'] * product_sales['Price']
-    product_sales = product_sales[['SaleID', 'ProductName', 'Category', 'Quantity', 'TotalPrice', 'SaleTimestamp']]
-    product_sales.to_csv('transformed_data/product_sales.csv', index=False)
+    return product_sales[['SaleID', 'ProductName', 'Category', 'Quantity', 'TotalPrice', 'SaleTimestamp']]
+
 
-    # Transform Customer_Sales data
+def to_customer_sales(sales, customers):
     customer_sales = sales.merge(customers, on='CustomerID')
-    customer_sales = customer_sales[['SaleID', 'CustomerName', 'Email', 'ProductID', 'Quantity', 'SaleTimestamp']]
-    customer_sales.to_csv('transformed_data/customer_sales.csv', index=False)
+    return customer_sales[['SaleID', 'CustomerName', 'Email', 'ProductID', 'Quantity', 'SaleTimestamp']]
 
-    print("Data transformation completed.")
-    return product_sales, customer_sales
+
+def transform_data(products, sales, customers):
+    products['Price'] = pd.to_numeric(products['Price'], errors='coerce')
+
+    # One pass over the sales chunks feeds both outputs
+    customer_sales = CsvSink(CUSTOMER_SALES_PATH)
+    sales = tee(map_items(clean_sales, sales),
+                lambda chunk: customer_sales.write(to_customer_sales(chunk, customers)))
+    product_sales = map_items(lambda chunk: to_product_sales(chunk, products), sales)
+    try:
+        rows = drain(product_sales, CsvSink(PRODUCT_SALES_PATH))
+    except Exception:
+        customer_sales.abort()
+        raise
+    customer_sales.close()
+
+    print(f"Data transformation completed ({rows} product sales rows).")
 
 
 def load_data():
@@ -65,13 +84,9 @@ def load_data():
         )
     ''')
 
-    # Load transformed data
-    product_sales = pd.read_csv('transformed_data/product_Sales.csv')
-    customer_sales = pd.read_csv('transformed_data/customer_Sales.csv')
-
-    # Insert data into tables
-    product_sales.to_sql('product_sales', conn, if_exists='replace', index=False)
-    customer_sales.to_sql('customer_sales', conn, if_exists='replace', index=False)
+    # Stream the transformed data into the tables chunk by chunk
+    drain(read_csv(PRODUCT_SALES_PATH, CHUNK_SIZE), SqlSink('product_sales', conn, if_exists='replace'))
+    drain(read_csv(CUSTOMER_SALES_PATH, CHUNK_SIZE), SqlSink('customer_sales', conn, if_exists='replace'))
 
     # Commit and close connection
     conn.commit()
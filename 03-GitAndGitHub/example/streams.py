@@ -0,0 +1,109 @@
+# streams.py
+# The operators etl_pipeline.py uses, copied from 08-BuildingDataPipelines/Examples/iot_pipeline/src/streams.py;
+# changes belong there first. That module also has read_sql, filter_items, batch, rebatch, window,
+# buffered and a ParquetSink.
+# Sources yield DataFrame chunks, operators take a stream and return a new lazy stream, and
+# drain() pulls the stream through one or more sinks.
+import os
+
+import pandas as pd
+
+CHUNK_SIZE = 10_000
+
+
+# Sources
+
+def read_csv(path, chunksize=CHUNK_SIZE, **options):
+    yield from pd.read_csv(path, chunksize=chunksize, **options)
+
+
+# Operators
+
+def map_items(func, stream):
+    for item in stream:
+        yield func(item)
+
+
+def tee(stream, *consumers):
+    ''' pass every item to each consumer as it goes by; nothing is buffered for slower branches '''
+    for item in stream:
+        for consumer in consumers:
+            consumer(item)
+        yield item
+
+
+# Sinks: write() takes one chunk, close() finishes the output, abort() discards it
+
+class CsvSink:
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def write(self, frame):
+        header = self.file is None
+        if header:
+            self.file = open(self.path, 'w', newline='')
+        frame.to_csv(self.file, header=header, index=False)
+
+    def close(self):
+        if self.file is None:
+            # An empty stream still leaves an (empty) file behind
+            open(self.path, 'w').close()
+        else:
+            self.file.close()
+
+    def abort(self):
+        if self.file is not None:
+            self.file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class SqlSink:
+    ''' append chunks to a table; on an SQLAlchemy engine all chunks are written in one transaction '''
+
+    def __init__(self, table_name, con, if_exists='append'):
+        self.table_name = table_name
+        self.con = con
+        self.if_exists = if_exists
+        self.connection = None
+        self.transaction = None
+
+    def write(self, frame):
+        if self.connection is None and hasattr(self.con, 'connect'):
+            self.connection = self.con.connect()
+            self.transaction = self.connection.begin()
+        frame.to_sql(self.table_name, self.connection or self.con, if_exists=self.if_exists, index=False)
+        # 'replace' applies to the first chunk only, the rest are appended to it
+        self.if_exists = 'append'
+
+    def close(self):
+        if self.connection is not None:
+            self.transaction.commit()
+            self.connection.close()
+            self.connection = None
+
+    def abort(self):
+        if self.connection is not None:
+            self.transaction.rollback()
+            self.connection.close()
+            self.connection = None
+
+
+def drain(stream, *sinks):
+    ''' pull the stream through the sinks and return the number of rows written.
+    sinks are closed in order, so a sink whose close cannot be undone (a commit) goes last '''
+    rows = 0
+    try:
+        for frame in stream:
+            for sink in sinks:
+                sink.write(frame)
+            rows += len(frame)
+        for sink in sinks:
+            sink.close()
+    except BaseException:
+        # Sinks closed before the failure are aborted too, so a failed drain leaves no partial output
+        for sink in sinks:
+            sink.abort()
+        raise
+    return rows
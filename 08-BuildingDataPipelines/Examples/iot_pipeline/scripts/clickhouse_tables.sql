@@ -27,3 +27,108 @@ CREATE TABLE IF NOT EXISTS hourly_humidity_avg (
     avg_hourly_humidity Float32
 ) ENGINE = MergeTree()
 ORDER BY (date, hour);
+
+-- Live tables written by the streaming mode (src/data_stream.py). A window is emitted again
+-- whenever it changes; ReplacingMergeTree keeps the latest emission per key, query with FINAL.
+CREATE TABLE IF NOT EXISTS daily_temperature_live (
+    date Date,
+    avg_daily_temperature Float32,
+    readings UInt32,
+    is_final UInt8,
+    updated_at DateTime64(3)
+) ENGINE = ReplacingMergeTree(updated_at)
+ORDER BY date;
+
+CREATE TABLE IF NOT EXISTS daily_humidity_live (
+    date Date,
+    avg_daily_humidity Float32,
+    readings UInt32,
+    is_final UInt8,
+    updated_at DateTime64(3)
+) ENGINE = ReplacingMergeTree(updated_at)
+ORDER BY date;
+
+CREATE TABLE IF NOT EXISTS hourly_temperature_live (
+    date Date,
+    hour UInt8,
+    avg_hourly_temperature Float32,
+    readings UInt32,
+    is_final UInt8,
+    updated_at DateTime64(3)
+) ENGINE = ReplacingMergeTree(updated_at)
+ORDER BY (date, hour);
+
+CREATE TABLE IF NOT EXISTS hourly_humidity_live (
+    date Date,
+    hour UInt8,
+    avg_hourly_humidity Float32,
+    readings UInt32,
+    is_final UInt8,
+    updated_at DateTime64(3)
+) ENGINE = ReplacingMergeTree(updated_at)
+ORDER BY (date, hour);
+
+-- Per-sensor statistics written by the batch transform (src/sensor_stats.py). The percentiles are
+-- t-digest estimates; centroid_means/centroid_weights hold the sketch, so hourly rows can be merged
+-- into any coarser window without the raw readings.
+CREATE TABLE IF NOT EXISTS hourly_temperature_stats (
+    date Date,
+    hour UInt8,
+    sensor_id UInt8,
+    readings UInt32,
+    min_temperature Float32,
+    max_temperature Float32,
+    mean_temperature Float32,
+    p50_temperature Float32,
+    p95_temperature Float32,
+    p99_temperature Float32,
+    centroid_means Array(Float64),
+    centroid_weights Array(UInt32)
+) ENGINE = MergeTree()
+ORDER BY (date, hour, sensor_id);
+
+CREATE TABLE IF NOT EXISTS hourly_humidity_stats (
+    date Date,
+    hour UInt8,
+    sensor_id UInt8,
+    readings UInt32,
+    min_humidity Float32,
+    max_humidity Float32,
+    mean_humidity Float32,
+    p50_humidity Float32,
+    p95_humidity Float32,
+    p99_humidity Float32,
+    centroid_means Array(Float64),
+    centroid_weights Array(UInt32)
+) ENGINE = MergeTree()
+ORDER BY (date, hour, sensor_id);
+
+CREATE TABLE IF NOT EXISTS daily_temperature_stats (
+    date Date,
+    sensor_id UInt8,
+    readings UInt32,
+    min_temperature Float32,
+    max_temperature Float32,
+    mean_temperature Float32,
+    p50_temperature Float32,
+    p95_temperature Float32,
+    p99_temperature Float32,
+    centroid_means Array(Float64),
+    centroid_weights Array(UInt32)
+) ENGINE = MergeTree()
+ORDER BY (date, sensor_id);
+
+CREATE TABLE IF NOT EXISTS daily_humidity_stats (
+    date Date,
+    sensor_id UInt8,
+    readings UInt32,
+    min_humidity Float32,
+    max_humidity Float32,
+    mean_humidity Float32,
+    p50_humidity Float32,
+    p95_humidity Float32,
+    p99_humidity Float32,
+    centroid_means Array(Float64),
+    centroid_weights Array(UInt32)
+) ENGINE = MergeTree()
+ORDER BY (date, sensor_id);
@@ -0,0 +1,13 @@
+# Connection settings shared by every stage of the IoT pipeline; the ports match docker-compose.yml
+POSTGRESQL_CONFIG = {
+    'host': 'localhost',
+    'port': '5432',
+    'dbname': 'iot_data',
+    'user': 'postgres',
+    'password': 'postgres'
+}
+
+CLICKHOUSE_CONFIG = {
+    'host': 'localhost',
+    'port': 8123
+}
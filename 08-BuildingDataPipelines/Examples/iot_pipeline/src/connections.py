@@ -0,0 +1,74 @@
+import atexit
+import os
+import threading
+
+from config import POSTGRESQL_CONFIG, CLICKHOUSE_CONFIG
+
+# Pool settings for the staging database engine
+POOL_SIZE = 5
+MAX_OVERFLOW = 5
+POOL_RECYCLE = 1800  # seconds
+
+
+class ConnectionManager:
+    ''' lazily created, pooled connections shared by all stages in one process '''
+
+    def __init__(self, postgresql_config=POSTGRESQL_CONFIG, clickhouse_config=CLICKHOUSE_CONFIG):
+        self.postgresql_config = postgresql_config
+        self.clickhouse_config = clickhouse_config
+        self._engine = None
+        self._client = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def _check_process(self):
+        # A forked worker must not reuse the parent's sockets: drop them without closing and start fresh
+        if os.getpid() != self._pid:
+            if self._engine is not None:
+                self._engine.dispose(close=False)
+            self._engine = None
+            self._client = None
+            self._pid = os.getpid()
+
+    def postgres_engine(self):
+        with self._lock:
+            self._check_process()
+            if self._engine is None:
+                # Imported here so importing a stage costs nothing until it connects
+                from sqlalchemy import create_engine
+                config = self.postgresql_config
+                self._engine = create_engine(
+                    f"postgresql://{config['user']}:{config['password']}@{config['host']}:{config['port']}/{config['dbname']}",
+                    pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_recycle=POOL_RECYCLE,
+                    # Test each pooled connection before use, so a restarted server does not fail a stage
+                    pool_pre_ping=True)
+            return self._engine
+
+    def clickhouse_client(self):
+        with self._lock:
+            self._check_process()
+            if self._client is None:
+                import clickhouse_connect
+                self._client = clickhouse_connect.get_client(**self.clickhouse_config)
+            return self._client
+
+    def close(self):
+        with self._lock:
+            if self._engine is not None:
+                self._engine.dispose()
+                self._engine = None
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+connections = ConnectionManager()
+atexit.register(connections.close)
+
+
+def get_postgres_engine():
+    return connections.postgres_engine()
+
+
+def get_clickhouse_client():
+    return connections.clickhouse_client()
@@ -0,0 +1,156 @@
+import argparse
+import glob
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import pandas as pd
+
+from data_transform import aggregate_sensor_data, save_results, save_stats
+from sensor_stats import sensor_statistics
+from streams import ParquetSink, drain
+
+# Directory paths
+ARCHIVE_DIR = '../data/archive'
+BACKFILL_RESULT_DIR = '../data/result/backfill/'
+
+SENSOR_TYPES = ['temperature', 'humidity']
+COMPRESSION = 'zstd'
+
+# Layout: ARCHIVE_DIR/<sensor_type>/date=YYYY-MM-DD/part-<id>.parquet
+# Every archive run compacts the partitions it wrote to, so each date keeps one part file
+
+
+def partition_dir(sensor_type, day):
+    return os.path.join(ARCHIVE_DIR, sensor_type, f'date={day.isoformat()}')
+
+
+class ArchiveSink:
+    ''' stream chunks of readings into one Parquet part file per date partition '''
+
+    def __init__(self, sensor_type):
+        self.sensor_type = sensor_type
+        self.parts = {}
+
+    def write(self, readings):
+        readings = readings.assign(timestamp=pd.to_datetime(readings['timestamp']))
+        for day, day_readings in readings.groupby(readings['timestamp'].dt.date):
+            if day not in self.parts:
+                directory = partition_dir(self.sensor_type, day)
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f'part-{uuid.uuid4().hex}.parquet')
+                self.parts[day] = ParquetSink(path, COMPRESSION)
+            self.parts[day].write(day_readings)
+
+    def close(self):
+        for part in self.parts.values():
+            part.close()
+
+    def abort(self):
+        for part in self.parts.values():
+            part.abort()
+
+    @property
+    def days(self):
+        return sorted(self.parts)
+
+
+def archive_files(files, sensor_type):
+    # Compact many small raw CSVs, given as (path, DataFrame) pairs, into one compressed
+    # Parquet file per date, then remove the CSVs
+    if not files:
+        return []
+    sink = ArchiveSink(sensor_type)
+    drain((readings for _, readings in files), sink)
+    compact_partitions(sensor_type, sink.days)
+    for file_path, _ in files:
+        os.remove(file_path)
+    print(f"Archived {len(files)} {sensor_type} files into {len(sink.days)} date partitions.")
+    return sink.days
+
+
+def compact_partition(sensor_type, day):
+    # Merge the part files of one date partition into a single file. The merged file is written under a
+    # temporary name first; a crash before the old parts are removed only leaves duplicate readings,
+    # which the transforms drop
+    part_paths = sorted(glob.glob(os.path.join(partition_dir(sensor_type, day), 'part-*.parquet')))
+    if len(part_paths) <= 1:
+        return
+    data = pd.concat([pd.read_parquet(path) for path in part_paths], ignore_index=True)
+    path = os.path.join(partition_dir(sensor_type, day), f'part-{uuid.uuid4().hex}.parquet')
+    data.to_parquet(path + '.tmp', index=False, compression=COMPRESSION)
+    os.replace(path + '.tmp', path)
+    for part_path in part_paths:
+        os.remove(part_path)
+
+
+def compact_partitions(sensor_type, days):
+    for day in days:
+        compact_partition(sensor_type, day)
+
+
+def read_partition(sensor_type, day):
+    part_paths = glob.glob(os.path.join(partition_dir(sensor_type, day), 'part-*.parquet'))
+    if not part_paths:
+        return pd.DataFrame(columns=['timestamp', 'sensor_id', sensor_type])
+    return pd.concat([pd.read_parquet(path) for path in part_paths], ignore_index=True)
+
+
+def transform_day(day):
+    # Each date partition is transformed on its own: daily and hourly means and statistics never span two dates
+    temp_data, humidity_data = read_partition('temperature', day), read_partition('humidity', day)
+    return aggregate_sensor_data(temp_data, humidity_data), sensor_statistics(temp_data, humidity_data)
+
+
+def concat_tables(daily_tables):
+    return {table_name: pd.concat([tables[table_name] for tables in daily_tables], ignore_index=True)
+            for table_name in daily_tables[0]}
+
+
+def archived_days(start_date, end_date):
+    days = set()
+    for sensor_type in SENSOR_TYPES:
+        for directory in glob.glob(os.path.join(ARCHIVE_DIR, sensor_type, 'date=*')):
+            day = date.fromisoformat(os.path.basename(directory).split('=', 1)[1])
+            if start_date <= day <= end_date:
+                days.add(day)
+    return sorted(days)
+
+
+def backfill(start_date, end_date, workers=os.cpu_count(), result_dir=BACKFILL_RESULT_DIR):
+    # Replay a date range from the archive through the transform, one date partition per task
+    days = archived_days(start_date, end_date)
+    if not days:
+        print(f"No archived data between {start_date} and {end_date}.")
+        return None
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        daily_outputs = list(executor.map(transform_day, days))
+
+    results = concat_tables([results for results, _ in daily_outputs])
+    stats = concat_tables([stats for _, stats in daily_outputs])
+    save_results(results, result_dir)
+    save_stats(stats, result_dir)
+    print(f"Backfilled {len(days)} days ({start_date} to {end_date}) into {result_dir}")
+    return results, stats
+
+
+def compact(start_date, end_date):
+    days = archived_days(start_date, end_date)
+    for sensor_type in SENSOR_TYPES:
+        compact_partitions(sensor_type, days)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Maintain and replay the date-partitioned sensor archive.')
+    parser.add_argument('command', choices=['backfill', 'compact'])
+    parser.add_argument('start_date', type=date.fromisoformat, help='first date, YYYY-MM-DD')
+    parser.add_argument('end_date', type=date.fromisoformat, help='last date, YYYY-MM-DD')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='parallel worker processes')
+    parser.add_argument('--result-dir', default=BACKFILL_RESULT_DIR, help='directory for the backfilled results')
+    args = parser.parse_args()
+
+    if args.command == 'backfill':
+        backfill(args.start_date, args.end_date, args.workers, args.result_dir)
+    else:
+        compact(args.start_date, args.end_date)
@@ -1,26 +1,15 @@
 import os
-import pandas as pd
-from sqlalchemy import create_engine
-import shutil
-
-# Database connection parameters
-DB_USERNAME = 'postgres'
-DB_PASSWORD = 'postgres'
-DB_HOST = 'localhost'
-DB_PORT = '5433'
-DB_NAME = 'iot_data'
+from connections import get_postgres_engine
+from data_archive import ArchiveSink, compact_partitions
+from streams import CHUNK_SIZE, SqlSink, buffered, drain, filter_items, read_csv
 
 # Directory paths
 DATA_DIR = '../data'
-ARCHIVE_DIR = '../data/archive'
-
-# Create a PostgreSQL database connection
-engine = create_engine(f'postgresql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}')
 
 
-def process_files():
-    # Ensure the archive directory exists
-    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+def process_files(chunksize=CHUNK_SIZE):
+    engine = get_postgres_engine()
+    archived_days = {'temperature': set(), 'humidity': set()}
 
     # Loop through all CSV files in the data directory
     for filename in os.listdir(DATA_DIR):
@@ -29,28 +18,36 @@ def process_files():
 
             # Determine the sensor type from the filename
             if "temperature" in filename:
-                table_name = "temperature_sensor_data"
+                sensor_type = "temperature"
             elif "humidity" in filename:
-                table_name = "humidity_sensor_data"
+                sensor_type = "humidity"
             else:
                 print(f"Unknown sensor type in file: {filename}")
                 continue
-
-            # Read the CSV file into a DataFrame
-            df = pd.read_csv(file_path)
-
-            # Insert the data into the appropriate table in PostgreSQL
+            table_name = f"{sensor_type}_sensor_data"
+
+            # Stream the CSV in one pass, chunk by chunk, into its date partitions of the archive and into
+            # the appropriate table in PostgreSQL; the next chunk is parsed while the current one is written.
+            # The archive parts are closed first and the insert, one transaction per file, commits last:
+            # if either fails, both are discarded
+            archive = ArchiveSink(sensor_type)
+            chunks = filter_items(lambda chunk: not chunk.empty, buffered(read_csv(file_path, chunksize)))
             try:
-                df.to_sql(table_name, engine, if_exists='append', index=False)
-                print(f"Inserted data from {filename} into {table_name} table.")
+                rows = drain(chunks, archive, SqlSink(table_name, engine))
+                print(f"Inserted {rows} rows from {filename} into {table_name} table.")
             except Exception as e:
                 print(f"Error inserting data from {filename}: {e}")
                 continue
 
-            # Move the processed file to the archive directory
-            archive_path = os.path.join(ARCHIVE_DIR, filename)
-            shutil.move(file_path, archive_path)
-            print(f"Moved {filename} to archive.")
+            # The file is removed as soon as its rows are committed, so a later failure cannot make
+            # the next run insert them again
+            os.remove(file_path)
+            archived_days[sensor_type].update(archive.days)
+
+    # Merge the part files this run added into one file per date partition
+    for sensor_type, days in archived_days.items():
+        compact_partitions(sensor_type, sorted(days))
+        print(f"Archived {sensor_type} files into {len(days)} date partitions.")
 
 
 if __name__ == "__main__":
@@ -1,14 +1,16 @@
 import pandas as pd
-import clickhouse_connect
+
+from connections import get_clickhouse_client
 
 # Directory paths
 RESULT_DIR = '../data/result/'
 
-# ClickHouse connection
-client = clickhouse_connect.get_client(host='localhost', port=8123)
+STATS_TABLES = ['hourly_temperature_stats', 'daily_temperature_stats', 'hourly_humidity_stats', 'daily_humidity_stats']
 
 
 def load_data():
+    client = get_clickhouse_client()
+
     # Load transformed data from CSV files
     temp_avg_data_hourly = pd.read_csv(f'{RESULT_DIR}hourly_temperature_avg.csv')
     temp_avg_data_daily = pd.read_csv(f'{RESULT_DIR}daily_temperature_avg.csv')
@@ -27,5 +29,13 @@ def load_data():
     client.insert_df('hourly_humidity_avg', humidity_avg_data_hourly)
     client.insert_df('daily_humidity_avg', humidity_avg_data_daily)
 
-# Execute data loading
-load_data()
+    # Per-sensor statistics with their quantile sketches
+    for table_name in STATS_TABLES:
+        stats = pd.read_parquet(f'{RESULT_DIR}{table_name}.parquet')
+        stats['date'] = pd.to_datetime(stats['date']).dt.date
+        client.insert_df(table_name, stats)
+
+
+if __name__ == "__main__":
+    # Execute data loading
+    load_data()
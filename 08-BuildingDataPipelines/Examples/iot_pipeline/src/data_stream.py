@@ -0,0 +1,176 @@
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from connections import get_clickhouse_client
+from generate_data import generate_sensor_data
+from data_archive import archive_files
+
+# Directory paths
+DATA_DIR = '../data'
+
+SENSOR_TYPES = ['temperature', 'humidity']
+
+# Readings older than the watermark (latest event time seen minus the allowed lateness)
+# can no longer change a window; windows that end before it are emitted as final
+ALLOWED_LATENESS = timedelta(minutes=5)
+BATCH_INTERVAL = 2  # seconds between micro-batches
+
+
+def generator_source(records_per_batch=100, max_delay_minutes=2):
+    # Readings produced in-process, as generate_data.py would write them, without the CSV round-trip
+    while True:
+        yield {sensor_type: generate_sensor_data(sensor_type, records_per_batch, max_delay_minutes)
+               for sensor_type in SENSOR_TYPES}
+
+
+def file_source(data_dir=DATA_DIR):
+    # New CSVs dropped into the data directory; consumed files go to the date-partitioned archive
+    while True:
+        batch = {}
+        consumed = {sensor_type: [] for sensor_type in SENSOR_TYPES}
+        for filename in sorted(os.listdir(data_dir)):
+            sensor_type = next((name for name in SENSOR_TYPES if name in filename), None)
+            if not filename.endswith('.csv') or sensor_type is None:
+                continue
+            file_path = os.path.join(data_dir, filename)
+            readings = pd.read_csv(file_path)
+            consumed[sensor_type].append((file_path, readings))
+        for sensor_type, files in consumed.items():
+            if files:
+                batch[sensor_type] = pd.concat([readings for _, readings in files], ignore_index=True)
+                archive_files(files, sensor_type)
+        yield batch
+
+
+class WindowedAggregator:
+    def __init__(self, allowed_lateness=ALLOWED_LATENESS):
+        self.allowed_lateness = allowed_lateness
+        # (sensor_type, 'hourly' | 'daily', date, hour) -> [sum, count]; hour is None for daily windows
+        self.windows = {}
+        self.updated = set()
+        self.max_event_time = None
+        self.batch_max_event_time = None
+        self.late_readings = 0
+
+    @property
+    def watermark(self):
+        return None if self.max_event_time is None else self.max_event_time - self.allowed_lateness
+
+    @staticmethod
+    def window_end(key):
+        _, granularity, day, hour = key
+        return day + (timedelta(hours=hour + 1) if granularity == 'hourly' else timedelta(days=1))
+
+    def add(self, sensor_type, readings):
+        if readings.empty:
+            return
+        timestamps = pd.to_datetime(readings['timestamp'])
+        frame = pd.DataFrame({
+            'date': timestamps.dt.normalize(),
+            'hour': timestamps.dt.hour,
+            'value': readings[sensor_type].astype('float64'),
+        }).dropna()
+
+        windows = {
+            'hourly': (['date', 'hour'], frame['date'] + pd.to_timedelta(frame['hour'] + 1, unit='h')),
+            'daily': (['date'], frame['date'] + pd.Timedelta(days=1)),
+        }
+        for granularity, (group_columns, window_ends) in windows.items():
+            # Readings for windows that were already emitted as final are dropped (counted once, on the hourly pass)
+            on_time = frame if self.watermark is None else frame[window_ends > self.watermark]
+            if granularity == 'hourly':
+                self.late_readings += len(frame) - len(on_time)
+            partials = on_time.groupby(group_columns)['value'].agg(['sum', 'count'])
+            for group, (total, count) in zip(partials.index, partials.to_numpy()):
+                day, hour = (group[0], int(group[1])) if granularity == 'hourly' else (group, None)
+                key = (sensor_type, granularity, day.to_pydatetime(), hour)
+                window = self.windows.setdefault(key, [0.0, 0])
+                window[0] += total
+                window[1] += int(count)
+                self.updated.add(key)
+
+        # The watermark only advances between micro-batches, so every sensor in a batch sees the same one
+        batch_max = timestamps.max().to_pydatetime()
+        if self.batch_max_event_time is None or batch_max > self.batch_max_event_time:
+            self.batch_max_event_time = batch_max
+
+    def flush(self):
+        # Emit the windows updated since the last flush and the windows the watermark has closed
+        if self.batch_max_event_time is not None and (self.max_event_time is None
+                                                      or self.batch_max_event_time > self.max_event_time):
+            self.max_event_time = self.batch_max_event_time
+        self.batch_max_event_time = None
+        watermark = self.watermark
+        final = {key for key in self.windows if watermark is not None and self.window_end(key) <= watermark}
+        emitted = {}
+        for key in sorted(self.updated | final, key=lambda key: (key[0], key[1], key[2], key[3] or 0)):
+            sensor_type, granularity, day, hour = key
+            total, count = self.windows[key]
+            row = {'date': day.date()}
+            if granularity == 'hourly':
+                row['hour'] = hour
+            row[f'avg_{granularity}_{sensor_type}'] = round(total / count, 2)
+            row['readings'] = count
+            row['is_final'] = int(key in final)
+            emitted.setdefault(f'{granularity}_{sensor_type}_live', []).append(row)
+        for key in final:
+            del self.windows[key]
+        self.updated.clear()
+        return {table_name: pd.DataFrame(rows) for table_name, rows in emitted.items()}
+
+
+class ClickHouseSink:
+    def __init__(self):
+        self.client = get_clickhouse_client()
+
+    def write(self, emitted):
+        # The *_live tables are ReplacingMergeTree(updated_at): the latest emission of a window wins
+        updated_at = datetime.now()
+        for table_name, data in emitted.items():
+            self.client.insert_df(table_name, data.assign(updated_at=updated_at))
+
+
+class ConsoleSink:
+    def write(self, emitted):
+        for table_name, data in emitted.items():
+            print(f"{table_name}:\n{data.to_string(index=False)}")
+
+
+def run_stream(source, sink, aggregator, batch_interval=BATCH_INTERVAL, max_batches=None):
+    batches = 0
+    for batch in source:
+        started = time.perf_counter()
+        for sensor_type, readings in batch.items():
+            aggregator.add(sensor_type, readings)
+        emitted = aggregator.flush()
+        if emitted:
+            sink.write(emitted)
+        elapsed = time.perf_counter() - started
+        windows = sum(len(data) for data in emitted.values())
+        print(f"Micro-batch {batches}: {sum(len(readings) for readings in batch.values())} readings, "
+              f"{windows} windows emitted in {elapsed * 1000:.1f} ms, watermark {aggregator.watermark}, "
+              f"{aggregator.late_readings} late readings dropped so far")
+        batches += 1
+        if max_batches is not None and batches >= max_batches:
+            break
+        time.sleep(max(0.0, batch_interval - elapsed))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Stream sensor readings into windowed averages in micro-batches.')
+    parser.add_argument('--source', choices=['generator', 'files'], default='generator')
+    parser.add_argument('--sink', choices=['clickhouse', 'console'], default='clickhouse')
+    parser.add_argument('--batch-interval', type=float, default=BATCH_INTERVAL, help='seconds between micro-batches')
+    parser.add_argument('--allowed-lateness', type=float, default=ALLOWED_LATENESS.total_seconds() / 60,
+                        help='minutes a reading may arrive after the latest event time')
+    parser.add_argument('--max-batches', type=int, help='stop after this many micro-batches')
+    args = parser.parse_args()
+
+    source = generator_source() if args.source == 'generator' else file_source()
+    sink = ClickHouseSink() if args.sink == 'clickhouse' else ConsoleSink()
+    aggregator = WindowedAggregator(timedelta(minutes=args.allowed_lateness))
+    run_stream(source, sink, aggregator, args.batch_interval, args.max_batches)
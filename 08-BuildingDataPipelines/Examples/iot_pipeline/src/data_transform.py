@@ -1,37 +1,21 @@
 import os
 import pandas as pd
-from sqlalchemy import create_engine
 
-# Database connection parameters
-DB_USERNAME = 'postgres'
-DB_PASSWORD = 'postgres'
-DB_HOST = 'localhost'
-DB_PORT = '5432'
-DB_NAME = 'iot_data'
+from connections import get_postgres_engine
+from sensor_stats import sensor_statistics
 
 # Directory paths
 RESULT_DIR = '../data/result/'
 
-# Create a PostgreSQL database connection
-engine = create_engine(f'postgresql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}')
-
-
-def transform_data():
-
-    # Ensure the archive directory exists
-    os.makedirs(RESULT_DIR, exist_ok=True)
-
-    # Load data from staging tables
-    temp_data = pd.read_sql('SELECT * FROM temperature_sensor_data', engine)
-    humidity_data = pd.read_sql('SELECT * FROM humidity_sensor_data', engine)
 
+def aggregate_sensor_data(temp_data, humidity_data):
     # Data Cleaning
-    temp_data.dropna(inplace=True)
-    humidity_data.dropna(inplace=True)
-    temp_data.drop_duplicates(inplace=True)
-    humidity_data.drop_duplicates(inplace=True)
+    temp_data = temp_data.dropna().drop_duplicates()
+    humidity_data = humidity_data.dropna().drop_duplicates()
 
     # Data Aggregation
+    temp_data['timestamp'] = pd.to_datetime(temp_data['timestamp'])
+    humidity_data['timestamp'] = pd.to_datetime(humidity_data['timestamp'])
     temp_data['date'] = temp_data['timestamp'].dt.date
     humidity_data['date'] = humidity_data['timestamp'].dt.date
     temp_data['hour'] = temp_data['timestamp'].dt.hour
@@ -57,18 +41,49 @@ def transform_data():
     hourly_temp_avg.rename(columns={'temperature': 'avg_hourly_temperature'}, inplace=True)
     hourly_humidity_avg.rename(columns={'humidity': 'avg_hourly_humidity'}, inplace=True)
 
+    return {
+        'daily_temperature_avg': daily_temp_avg,
+        'daily_humidity_avg': daily_humidity_avg,
+        'hourly_temperature_avg': hourly_temp_avg,
+        'hourly_humidity_avg': hourly_humidity_avg,
+    }
+
+
+def save_results(results, result_dir=RESULT_DIR):
     # Save transformed data to CSV
-    daily_temp_avg.to_csv(f'{RESULT_DIR}daily_temperature_avg.csv', index=False)
-    daily_humidity_avg.to_csv(f'{RESULT_DIR}daily_humidity_avg.csv', index=False)
-    hourly_temp_avg.to_csv(f'{RESULT_DIR}hourly_temperature_avg.csv', index=False)
-    hourly_humidity_avg.to_csv(f'{RESULT_DIR}hourly_humidity_avg.csv', index=False)
+    os.makedirs(result_dir, exist_ok=True)
+    for table_name, data in results.items():
+        data.to_csv(os.path.join(result_dir, f'{table_name}.csv'), index=False)
+
+
+def save_stats(stats, result_dir=RESULT_DIR):
+    # Parquet keeps the sketch centroid arrays, which a CSV would flatten into strings
+    os.makedirs(result_dir, exist_ok=True)
+    for table_name, data in stats.items():
+        data.to_parquet(os.path.join(result_dir, f'{table_name}.parquet'), index=False)
+
+
+def transform_data():
+    engine = get_postgres_engine()
+
+    # Ensure the archive directory exists
+    os.makedirs(RESULT_DIR, exist_ok=True)
+
+    # Load data from staging tables
+    temp_data = pd.read_sql('SELECT * FROM temperature_sensor_data', engine)
+    humidity_data = pd.read_sql('SELECT * FROM humidity_sensor_data', engine)
+
+    results = aggregate_sensor_data(temp_data, humidity_data)
+    save_results(results)
+
+    # Per-sensor statistics, loaded into ClickHouse only
+    save_stats(sensor_statistics(temp_data, humidity_data))
 
     # Load transformed data to the database or data warehouse
-    daily_temp_avg.to_sql('daily_temperature_avg', engine, if_exists='replace', index=False)
-    daily_humidity_avg.to_sql('daily_humidity_avg', engine, if_exists='replace', index=False)
-    hourly_temp_avg.to_sql('hourly_temperature_avg', engine, if_exists='replace', index=False)
-    hourly_humidity_avg.to_sql('hourly_humidity_avg', engine, if_exists='replace', index=False)
+    for table_name, data in results.items():
+        data.to_sql(table_name, engine, if_exists='replace', index=False)
 
 
-# Execute transformation
-transform_data()
+if __name__ == "__main__":
+    # Execute transformation
+    transform_data()
@@ -8,10 +8,10 @@ import time
 DATA_DIR = '../data/'
 
 
-def generate_sensor_data(sensor_type, num_records):
+def generate_sensor_data(sensor_type, num_records, max_delay_minutes=1000):
     data = []
     for _ in range(num_records):
-        timestamp = datetime.now() - timedelta(minutes=random.randint(1, 1000))
+        timestamp = datetime.now() - timedelta(minutes=random.randint(1, max_delay_minutes))
         sensor_id = random.randint(1, 10)
         if sensor_type == "temperature":
             value = round(random.uniform(15.0, 30.0), 2)
@@ -0,0 +1,76 @@
+import math
+
+import numpy as np
+
+# Upper bound on the number of centroids is about COMPRESSION / 2, whatever the number of readings
+COMPRESSION = 100
+
+
+def _scale(q, compression):
+    # k1 scale function: clusters are small near q = 0 and q = 1, so the tail percentiles stay accurate
+    return compression / (2 * math.pi) * np.arcsin(2 * q - 1)
+
+
+def _compress(means, weights, compression):
+    # Merge sorted centroids so that each cluster spans at most one unit of the scale function
+    order = np.argsort(means, kind='stable')
+    means, weights = means[order], weights[order]
+    total = weights.sum()
+    q_left = (np.cumsum(weights) - weights) / total
+    clusters = np.floor(_scale(q_left, compression) - _scale(0.0, compression)).astype(np.int64)
+    _, clusters = np.unique(clusters, return_inverse=True)
+    merged_weights = np.bincount(clusters, weights=weights)
+    merged_means = np.bincount(clusters, weights=means * weights) / merged_weights
+    return merged_means, merged_weights
+
+
+class TDigest:
+    ''' fixed-size, mergeable quantile sketch (merging t-digest) '''
+
+    def __init__(self, means, weights, minimum, maximum, compression=COMPRESSION):
+        self.means = means
+        self.weights = weights
+        self.min = minimum
+        self.max = maximum
+        self.compression = compression
+
+    @classmethod
+    def from_values(cls, values, compression=COMPRESSION):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return cls(np.empty(0), np.empty(0), math.nan, math.nan, compression)
+        means, weights = _compress(values, np.ones(len(values)), compression)
+        return cls(means, weights, values.min(), values.max(), compression)
+
+    @classmethod
+    def from_arrays(cls, means, weights, minimum, maximum, compression=COMPRESSION):
+        return cls(np.asarray(means, dtype=np.float64), np.asarray(weights, dtype=np.float64),
+                   minimum, maximum, compression)
+
+    @classmethod
+    def merge_all(cls, digests, compression=COMPRESSION):
+        ''' combine digests of disjoint readings into one, as if built from all of them '''
+        digests = [digest for digest in digests if digest.count]
+        if not digests:
+            return cls.from_values([], compression)
+        means, weights = _compress(np.concatenate([digest.means for digest in digests]),
+                                   np.concatenate([digest.weights for digest in digests]), compression)
+        return cls(means, weights, min(digest.min for digest in digests),
+                   max(digest.max for digest in digests), compression)
+
+    @property
+    def count(self):
+        return int(self.weights.sum())
+
+    @property
+    def mean(self):
+        return float((self.means * self.weights).sum() / self.weights.sum()) if self.count else math.nan
+
+    def quantile(self, q):
+        if not self.count:
+            return math.nan
+        # Interpolate between centroid centres, anchored at the exact minimum and maximum
+        centres = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate([[0.0], centres, [self.weights.sum()]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(q * self.weights.sum(), positions, values))
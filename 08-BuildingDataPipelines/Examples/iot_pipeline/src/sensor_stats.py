@@ -0,0 +1,58 @@
+import pandas as pd
+
+from quantile_sketch import TDigest
+
+SENSOR_TYPES = ['temperature', 'humidity']
+PERCENTILES = {'p50': 0.5, 'p95': 0.95, 'p99': 0.99}
+
+
+def hourly_sketches(data, sensor_type):
+    ''' one t-digest per (date, hour, sensor_id), built from the raw readings '''
+    data = data.dropna().drop_duplicates()
+    timestamps = pd.to_datetime(data['timestamp'])
+    groups = data[sensor_type].groupby([timestamps.dt.date.rename('date'), timestamps.dt.hour.rename('hour'),
+                                        data['sensor_id']])
+    rows = [(day, hour, sensor_id, TDigest.from_values(values.to_numpy()))
+            for (day, hour, sensor_id), values in groups]
+    return pd.DataFrame(rows, columns=['date', 'hour', 'sensor_id', 'sketch'])
+
+
+def daily_sketches(hourly):
+    ''' roll hourly sketches up to (date, sensor_id) by merging them, without the raw readings '''
+    groups = hourly.groupby(['date', 'sensor_id'])['sketch']
+    rows = [(day, sensor_id, TDigest.merge_all(sketches)) for (day, sensor_id), sketches in groups]
+    return pd.DataFrame(rows, columns=['date', 'sensor_id', 'sketch'])
+
+
+def sketches_from_stats(stats):
+    # Rebuild the sketches of a stored stats table, e.g. hourly rows read back from ClickHouse or Parquet
+    sketches = [TDigest.from_arrays(means, weights, minimum, maximum) for means, weights, minimum, maximum in zip(
+        stats['centroid_means'], stats['centroid_weights'], stats.filter(like='min_').iloc[:, 0],
+        stats.filter(like='max_').iloc[:, 0])]
+    return stats.drop(columns=['centroid_means', 'centroid_weights']).assign(sketch=sketches)
+
+
+def sketch_stats(sketches, sensor_type):
+    # Min and max are exact; mean is exact up to float rounding; the percentiles are sketch estimates
+    stats = sketches.drop(columns='sketch')
+    digests = sketches['sketch']
+    stats['readings'] = [digest.count for digest in digests]
+    stats[f'min_{sensor_type}'] = [digest.min for digest in digests]
+    stats[f'max_{sensor_type}'] = [digest.max for digest in digests]
+    stats[f'mean_{sensor_type}'] = [round(digest.mean, 2) for digest in digests]
+    for name, q in PERCENTILES.items():
+        stats[f'{name}_{sensor_type}'] = [round(digest.quantile(q), 2) for digest in digests]
+    # The centroids are stored with the stats so later rollups can merge them
+    stats['centroid_means'] = [digest.means.tolist() for digest in digests]
+    stats['centroid_weights'] = [digest.weights.astype('int64').tolist() for digest in digests]
+    return stats
+
+
+def sensor_statistics(temp_data, humidity_data):
+    ''' per-sensor hourly and daily min/max/mean/p50/p95/p99 tables '''
+    results = {}
+    for sensor_type, data in zip(SENSOR_TYPES, [temp_data, humidity_data]):
+        hourly = hourly_sketches(data, sensor_type)
+        results[f'hourly_{sensor_type}_stats'] = sketch_stats(hourly, sensor_type)
+        results[f'daily_{sensor_type}_stats'] = sketch_stats(daily_sketches(hourly), sensor_type)
+    return results
@@ -0,0 +1,236 @@
+# streams.py
+# Small generator-based operators for building pipelines that hold one chunk in memory at a time.
+# Sources yield DataFrame chunks, operators take a stream and return a new lazy stream, and
+# drain() pulls the stream through one or more sinks.
+# 03-GitAndGitHub/example/streams.py is a trimmed copy of this module; keep it in step.
+import os
+import queue
+import threading
+from collections import deque
+
+import pandas as pd
+
+CHUNK_SIZE = 10_000
+BUFFER_SIZE = 4  # chunks a buffered() producer may run ahead of its consumer
+
+
+# Sources
+
+def read_csv(path, chunksize=CHUNK_SIZE, **options):
+    yield from pd.read_csv(path, chunksize=chunksize, **options)
+
+
+def read_sql(query, con, chunksize=CHUNK_SIZE, params=None):
+    if hasattr(con, 'connect'):
+        # SQLAlchemy engine: a server-side cursor, so the driver does not fetch the whole result first
+        with con.connect().execution_options(stream_results=True) as connection:
+            yield from pd.read_sql_query(query, connection, params=params, chunksize=chunksize)
+    else:
+        yield from pd.read_sql_query(query, con, params=params, chunksize=chunksize)
+
+
+# Operators
+
+def map_items(func, stream):
+    for item in stream:
+        yield func(item)
+
+
+def filter_items(predicate, stream):
+    for item in stream:
+        if predicate(item):
+            yield item
+
+
+def batch(stream, size):
+    ''' group items into lists of `size` (the last one may be shorter) '''
+    items = []
+    for item in stream:
+        items.append(item)
+        if len(items) == size:
+            yield items
+            items = []
+    if items:
+        yield items
+
+
+def rebatch(frames, rows):
+    ''' re-cut a stream of DataFrames into frames of exactly `rows` rows (the last one may be shorter) '''
+    pending, pending_rows = [], 0
+    for frame in frames:
+        pending.append(frame)
+        pending_rows += len(frame)
+        while pending_rows >= rows:
+            combined = pd.concat(pending, ignore_index=True)
+            yield combined.iloc[:rows].reset_index(drop=True)
+            pending, pending_rows = [combined.iloc[rows:]], pending_rows - rows
+    if pending_rows:
+        yield pd.concat(pending, ignore_index=True)
+
+
+def window(stream, size, step=1):
+    ''' sliding windows of the last `size` items, one every `step` items '''
+    items = deque(maxlen=size)
+    for count, item in enumerate(stream, 1):
+        items.append(item)
+        if count >= size and (count - size) % step == 0:
+            yield tuple(items)
+
+
+def tee(stream, *consumers):
+    ''' pass every item to each consumer as it goes by; nothing is buffered for slower branches '''
+    for item in stream:
+        for consumer in consumers:
+            consumer(item)
+        yield item
+
+
+_ITEM, _DONE, _ERROR = range(3)
+
+
+def buffered(stream, size=BUFFER_SIZE):
+    ''' run the upstream in a background thread, at most `size` items ahead of the consumer.
+    the upstream must not use a connection bound to the consuming thread (e.g. sqlite3) '''
+    items = queue.Queue(maxsize=size)
+    stop = threading.Event()
+
+    def put(entry):
+        # Blocks while the buffer is full: this is the backpressure on the producer
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in stream:
+                if not put((_ITEM, item)):
+                    return
+            put((_DONE, None))
+        except Exception as e:
+            put((_ERROR, e))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            kind, value = items.get()
+            if kind == _DONE:
+                return
+            if kind == _ERROR:
+                raise value
+            yield value
+    finally:
+        stop.set()
+        producer.join()
+
+
+# Sinks: write() takes one chunk, close() finishes the output, abort() discards it
+
+class CsvSink:
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def write(self, frame):
+        header = self.file is None
+        if header:
+            self.file = open(self.path, 'w', newline='')
+        frame.to_csv(self.file, header=header, index=False)
+
+    def close(self):
+        if self.file is None:
+            # An empty stream still leaves an (empty) file behind
+            open(self.path, 'w').close()
+        else:
+            self.file.close()
+
+    def abort(self):
+        if self.file is not None:
+            self.file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class ParquetSink:
+    def __init__(self, path, compression='snappy'):
+        self.path = path
+        self.compression = compression
+        self.writer = None
+
+    def write(self, frame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self.writer is None:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            self.writer = pq.ParquetWriter(self.path, table.schema, compression=self.compression)
+        else:
+            # Later chunks are written with the schema of the first one
+            table = pa.Table.from_pandas(frame, schema=self.writer.schema, preserve_index=False)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+    def abort(self):
+        # The file is removed even when closing it fails
+        try:
+            self.close()
+        finally:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class SqlSink:
+    ''' append chunks to a table; on an SQLAlchemy engine all chunks are written in one transaction '''
+
+    def __init__(self, table_name, con, if_exists='append'):
+        self.table_name = table_name
+        self.con = con
+        self.if_exists = if_exists
+        self.connection = None
+        self.transaction = None
+
+    def write(self, frame):
+        if self.connection is None and hasattr(self.con, 'connect'):
+            self.connection = self.con.connect()
+            self.transaction = self.connection.begin()
+        frame.to_sql(self.table_name, self.connection or self.con, if_exists=self.if_exists, index=False)
+        # 'replace' applies to the first chunk only, the rest are appended to it
+        self.if_exists = 'append'
+
+    def close(self):
+        if self.connection is not None:
+            self.transaction.commit()
+            self.connection.close()
+            self.connection = None
+
+    def abort(self):
+        if self.connection is not None:
+            self.transaction.rollback()
+            self.connection.close()
+            self.connection = None
+
+
+def drain(stream, *sinks):
+    ''' pull the stream through the sinks and return the number of rows written.
+    sinks are closed in order, so a sink whose close cannot be undone (a commit) goes last '''
+    rows = 0
+    try:
+        for frame in stream:
+            for sink in sinks:
+                sink.write(frame)
+            rows += len(frame)
+        for sink in sinks:
+            sink.close()
+    except BaseException:
+        # Sinks closed before the failure are aborted too, so a failed drain leaves no partial output
+        for sink in sinks:
+            sink.abort()
+        raise
+    return rows
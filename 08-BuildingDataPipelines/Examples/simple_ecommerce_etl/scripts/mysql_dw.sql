@@ -1,18 +1,28 @@
 CREATE DATABASE IF NOT EXISTS data_warehouse;
+-- A warehouse created before the row_hash and SCD type 2 columns is upgraded by mysql_dw_upgrade.sql
 
+-- SCD type 1: changed customers are overwritten in place
 CREATE TABLE IF NOT EXISTS dim_customer (
     customer_id SERIAL PRIMARY KEY,
     name VARCHAR(255) NOT NULL,
     email VARCHAR(255) UNIQUE NOT NULL,
-    join_date DATE NOT NULL
+    join_date DATE NOT NULL,
+    row_hash BIGINT NOT NULL
 );
 
 
+-- SCD type 2: a changed product gets a new version, the previous one is closed with valid_to
 CREATE TABLE IF NOT EXISTS dim_inventory (
-    product_id SERIAL PRIMARY KEY,
+    inventory_key SERIAL PRIMARY KEY,
+    product_id INT NOT NULL,
     product_name VARCHAR(255) NOT NULL,
     quantity INT NOT NULL CHECK (quantity >= 0),
-    price DECIMAL(10, 2) NOT NULL CHECK (price >= 0)
+    price DECIMAL(10, 2) NOT NULL CHECK (price >= 0),
+    row_hash BIGINT NOT NULL,
+    valid_from DATETIME NOT NULL,
+    valid_to DATETIME NULL,
+    is_current BOOLEAN NOT NULL DEFAULT TRUE,
+    INDEX (product_id, is_current)
 );
 
 
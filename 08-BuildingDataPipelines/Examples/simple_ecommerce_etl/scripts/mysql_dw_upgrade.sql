@@ -0,0 +1,26 @@
+-- Upgrades a warehouse created by an earlier mysql_dw.sql, from before change detection.
+-- CREATE TABLE IF NOT EXISTS leaves existing tables as they are, so run this once on such a warehouse.
+-- Existing rows get row_hash 0, which never matches a real hash: the first ETL run rewrites each of
+-- them once (SCD type 2 products get one extra version) and stores their real hashes.
+-- Remove ../state before that run, so the hash index is rebuilt from the warehouse.
+USE data_warehouse;
+
+ALTER TABLE dim_customer
+    ADD COLUMN row_hash BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE dim_customer ALTER COLUMN row_hash DROP DEFAULT;
+
+
+-- product_id was a SERIAL primary key (auto-increment, unique); versions now share it
+ALTER TABLE dim_inventory
+    MODIFY product_id INT NOT NULL,
+    DROP PRIMARY KEY,
+    DROP INDEX product_id,
+    ADD COLUMN inventory_key SERIAL PRIMARY KEY FIRST,
+    ADD COLUMN row_hash BIGINT NOT NULL DEFAULT 0,
+    ADD COLUMN valid_from DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ADD COLUMN valid_to DATETIME NULL,
+    ADD COLUMN is_current BOOLEAN NOT NULL DEFAULT TRUE,
+    ADD INDEX (product_id, is_current);
+ALTER TABLE dim_inventory
+    ALTER COLUMN row_hash DROP DEFAULT,
+    ALTER COLUMN valid_from DROP DEFAULT;
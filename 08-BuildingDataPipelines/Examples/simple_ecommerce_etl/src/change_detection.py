@@ -0,0 +1,122 @@
+# change_detection.py
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from dtype_planner import NUMERIC_SCALES
+
+# Dimensions loaded by change detection instead of plain appends:
+#   type 1 - a changed row overwrites the warehouse row
+#   type 2 - a changed row closes the current version (valid_to, is_current = 0) and adds a new one
+SCD_CONFIG = {
+    'dim_customer': {'key': 'customer_id', 'attributes': ['name', 'email', 'join_date'], 'type': 1},
+    'dim_inventory': {'key': 'product_id', 'attributes': ['product_name', 'quantity', 'price'], 'type': 2},
+}
+
+HASH_COLUMN = 'row_hash'
+
+
+def row_hashes(frame, columns):
+    ''' stable 64-bit content hash per row, independent of the dtypes the frame happens to use '''
+    canonical = {}
+    for column in columns:
+        values = frame[column]
+        if column in NUMERIC_SCALES:
+            # Decimal columns hash their value at the warehouse scale, so float noise does not count as a change
+            scale = 10 ** NUMERIC_SCALES[column]
+            canonical[column] = (values.astype('float64') * scale).round().astype('Int64')
+        elif pd.api.types.is_integer_dtype(values):
+            canonical[column] = values.astype('Int64')
+        else:
+            canonical[column] = values.astype('string')
+    hashes = pd.util.hash_pandas_object(pd.DataFrame(canonical, index=frame.index), index=False)
+    # Stored in a signed BIGINT column
+    return pd.Series(hashes.to_numpy().view(np.int64), index=frame.index, name=HASH_COLUMN)
+
+
+class HashIndex:
+    ''' business key -> current row hash of one dimension, kept in a local Parquet file '''
+
+    def __init__(self, state_dir, table_name, key_column):
+        self.path = os.path.join(state_dir, f'{table_name}_hashes.parquet')
+        self.key_column = key_column
+        self.hashes = None
+
+    def load(self, fetch_current_hashes):
+        if os.path.exists(self.path):
+            index = pd.read_parquet(self.path)
+        else:
+            # No local index yet: build it once from the warehouse
+            logging.info(f"Building hash index {self.path} from the warehouse")
+            index = fetch_current_hashes()
+        self.hashes = pd.Series(index[HASH_COLUMN].to_numpy(dtype=np.int64),
+                                index=index[self.key_column].to_numpy(dtype=np.int64))
+
+    def update(self, keys, hashes):
+        updated = pd.Series(hashes.to_numpy(dtype=np.int64), index=keys.to_numpy(dtype=np.int64))
+        self.hashes = pd.concat([self.hashes[~self.hashes.index.isin(updated.index)], updated])
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        index = pd.DataFrame({self.key_column: self.hashes.index, HASH_COLUMN: self.hashes.to_numpy()})
+        tmp_path = self.path + '.tmp'
+        index.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+
+
+class ChangeDetector:
+    def __init__(self, state_dir, loader):
+        self.state_dir = state_dir
+        self.loader = loader
+        self.indexes = {}
+
+    def _index(self, table_name):
+        if table_name not in self.indexes:
+            scd = SCD_CONFIG[table_name]
+            index = HashIndex(self.state_dir, table_name, scd['key'])
+            index.load(lambda: self.loader.fetch_current_hashes(table_name, scd['key'], scd['type'] == 2))
+            self.indexes[table_name] = index
+        return self.indexes[table_name]
+
+    @staticmethod
+    def _classify(current, data, key_column):
+        # Positions in the index; -1 marks keys the index has never seen
+        positions = current.index.get_indexer(data[key_column].to_numpy(dtype=np.int64))
+        is_new = positions < 0
+        known = current.to_numpy()[np.where(is_new, 0, positions)] if len(current) else np.zeros(len(data), np.int64)
+        return is_new, ~is_new & (known != data[HASH_COLUMN].to_numpy())
+
+    def _reconcile(self, index, keys, table_name):
+        # The local index can lag the warehouse: a run that died between the warehouse commit and
+        # commit(), or rows written outside the ETL. The keys about to be written are checked against
+        # the warehouse, so they are neither re-inserted nor given a duplicate SCD type 2 version.
+        scd = SCD_CONFIG[table_name]
+        found = self.loader.fetch_current_hashes(table_name, scd['key'], scd['type'] == 2, keys)
+        if found.empty:
+            return False
+        warehouse = pd.Series(found[HASH_COLUMN].to_numpy(dtype=np.int64),
+                              index=found[scd['key']].to_numpy(dtype=np.int64))
+        stale = index.hashes.reindex(warehouse.index).to_numpy() != warehouse.to_numpy()
+        if not stale.any():
+            return False
+        logging.warning(f"Hash index of {table_name} was behind the warehouse for {int(stale.sum())} keys, reconciled")
+        index.update(pd.Series(warehouse.index[stale]), pd.Series(warehouse.to_numpy()[stale]))
+        return True
+
+    def split(self, data, table_name):
+        ''' split a dimension batch into new keys and keys whose row hash changed; unchanged rows are dropped '''
+        key_column = SCD_CONFIG[table_name]['key']
+        index = self._index(table_name)
+        is_new, is_changed = self._classify(index.hashes, data, key_column)
+        to_write = is_new | is_changed
+        if to_write.any() and self._reconcile(index, data.loc[to_write, key_column], table_name):
+            is_new, is_changed = self._classify(index.hashes, data, key_column)
+        new_rows, changed_rows = data[is_new], data[is_changed]
+        logging.info(f"Change detection for {table_name}: {len(new_rows)} new, {len(changed_rows)} changed, "
+                     f"{len(data) - len(new_rows) - len(changed_rows)} unchanged")
+        return new_rows, changed_rows
+
+    def commit(self, data, table_name):
+        # Only called after the warehouse write committed
+        key_column = SCD_CONFIG[table_name]['key']
+        self._index(table_name).update(data[key_column], data[HASH_COLUMN])
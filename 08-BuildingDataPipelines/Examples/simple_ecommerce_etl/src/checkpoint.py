@@ -0,0 +1,71 @@
+# checkpoint.py
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+
+import pandas as pd
+
+
+class CheckpointStore:
+    ''' intermediate batches of one ETL run as Parquet files, plus a manifest of the completed stages '''
+
+    def __init__(self, directory, run_key):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        # Checkpoints are only reused by a run with the same key (the extract query)
+        self.run_key = hashlib.sha256(run_key.encode('utf-8')).hexdigest()
+        self.manifest = self._load_manifest()
+
+    def _new_manifest(self):
+        return {'run_key': self.run_key, 'started_at': datetime.now().isoformat(), 'completed': {}}
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return self._new_manifest()
+        with open(self.manifest_path, 'r') as file:
+            manifest = json.load(file)
+        if manifest.get('run_key') != self.run_key:
+            logging.info("Discarding checkpoints written for a different extract query")
+            self.clear()
+            return self._new_manifest()
+        logging.info(f"Resuming run started at {manifest['started_at']}, completed stages: {list(manifest['completed'])}")
+        return manifest
+
+    def _write_manifest(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(self.manifest, file, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    @property
+    def run_id(self):
+        # Start time of the run, kept by every resume of it; names the run's other outputs
+        return datetime.fromisoformat(self.manifest['started_at']).strftime('%Y-%m-%d_%H-%M-%S')
+
+    def is_done(self, stage):
+        return stage in self.manifest['completed']
+
+    def mark_done(self, stage):
+        self.manifest['completed'][stage] = datetime.now().isoformat()
+        self._write_manifest()
+
+    def _frame_path(self, name):
+        return os.path.join(self.directory, f'{name}.parquet')
+
+    def save_frame(self, name, data):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._frame_path(name) + '.tmp'
+        data.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self._frame_path(name))
+
+    def load_frame(self, name):
+        return pd.read_parquet(self._frame_path(name))
+
+    def clear(self):
+        # Called once every stage has committed; the next run starts from the extract again
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
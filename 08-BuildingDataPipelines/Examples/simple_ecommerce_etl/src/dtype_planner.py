@@ -0,0 +1,64 @@
+# dtype_planner.py
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Decimal places of the DECIMAL(10, 2) columns in scripts/mysql_dw.sql
+NUMERIC_SCALES = {'amount': 2, 'amount_usd': 2, 'price': 2}
+
+# Strings with at most this many distinct values per row are stored as categoricals
+CATEGORY_RATIO = 0.5
+
+INTEGER_TYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+class DtypePlanner:
+    def __init__(self, scales=None, category_ratio=CATEGORY_RATIO):
+        self.scales = NUMERIC_SCALES if scales is None else scales
+        self.category_ratio = category_ratio
+
+    def _integer_dtype(self, values):
+        present = values.dropna()
+        low, high = (present.min(), present.max()) if len(present) else (0, 0)
+        for integer_type in INTEGER_TYPES:
+            info = np.iinfo(integer_type)
+            if info.min <= low and high <= info.max:
+                name = np.dtype(integer_type).name
+                # Missing values need the nullable extension type (Int8, Int16, ...)
+                return name.capitalize() if values.isna().any() else name
+        return values.dtype
+
+    def plan(self, frame):
+        ''' pick a compact dtype for every column that has one '''
+        dtypes = {}
+        for column in frame.columns:
+            values = frame[column]
+            if pd.api.types.is_bool_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+                continue
+            if pd.api.types.is_integer_dtype(values):
+                dtypes[column] = self._integer_dtype(values)
+            elif pd.api.types.is_float_dtype(values) and column in self.scales:
+                # Decimal columns stay float64: float32 cannot hold every DECIMAL(10, 2) value to the cent
+                # (above 131072 its spacing is 1/64), and its values print as 32.9900016784668
+                dtypes[column] = 'float64'
+            elif (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)) and len(values):
+                if values.nunique() / len(values) <= self.category_ratio:
+                    dtypes[column] = 'category'
+        return dtypes
+
+    def apply(self, frame, name):
+        ''' convert a frame to its planned dtypes and log the memory saved '''
+        before = frame.memory_usage(deep=True).sum()
+        dtypes = self.plan(frame)
+        columns = {}
+        for column in frame.columns:
+            values = frame[column]
+            if column in self.scales and column in dtypes:
+                # Round to the warehouse scale first, the DECIMAL column would do the same on insert
+                values = values.round(self.scales[column])
+            columns[column] = values.astype(dtypes[column]) if column in dtypes else values
+        planned = pd.DataFrame(columns, index=frame.index)
+        after = planned.memory_usage(deep=True).sum()
+        logging.info(f"Planned dtypes for {name}: {before / 1024:.1f} KB -> {after / 1024:.1f} KB")
+        return planned
@@ -1,22 +1,164 @@
 # logging_config.py
+import argparse
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Size-based rotation of the log file
+MAX_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 5
+
+# Attributes every LogRecord has; anything else came in through `extra=` and is added to the JSON output
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    ''' one JSON object per line '''
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in RECORD_ATTRIBUTES})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DeferredFormatQueueHandler(logging.handlers.QueueHandler):
+    ''' queue handler that leaves the formatting to the listener thread '''
+
+    def prepare(self, record):
+        # Only the message arguments and the traceback are resolved in the calling thread,
+        # since they may not be picklable or may change before the listener gets to them
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    ''' token bucket per call site: at most `burst` records at once and `rate` per second after that '''
+
+    def __init__(self, rate=10.0, burst=20, max_level=logging.INFO):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        # Warnings and errors are never dropped
+        self.max_level = max_level
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        # Messages are f-strings, so the call site identifies "the same message" (e.g. one per file or batch)
+        site = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self.lock:
+            tokens, last_time, suppressed = self.buckets.get(site, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - last_time) * self.rate)
+            if tokens < 1:
+                self.buckets[site] = (tokens, now, suppressed + 1)
+                return False
+            self.buckets[site] = (tokens - 1, now, 0)
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+            record.args = None
+        return True
 
 
 class LoggingConfig:
     @staticmethod
-    def setup_logging(path):
+    def setup_logging(path, queued=True, json_format=False, console=True, rate_limit=None,
+                      max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT):
+        ''' configure the root logger; with queued=True the caller only enqueues records and a
+        background thread does the formatting and I/O '''
         # Create handlers
-        console_handler = logging.StreamHandler()
-        file_handler = logging.FileHandler(path)
+        handlers = [logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count)]
+        if console:
+            handlers.append(logging.StreamHandler())
+
+        # Set logs levels and the formatter
+        formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+        for handler in handlers:
+            handler.setLevel(logging.INFO)
+            handler.setFormatter(formatter)
 
-        # Set logs levels
-        console_handler.setLevel(logging.INFO)
-        file_handler.setLevel(logging.INFO)
+        listener = None
+        if queued:
+            log_queue = queue.SimpleQueue()
+            listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+            listener.start()
+            # Drain whatever is still queued when the process exits
+            atexit.register(listener.stop)
+            handlers = [DeferredFormatQueueHandler(log_queue)]
 
-        # Create a formatter and set it for handlers
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        console_handler.setFormatter(formatter)
-        file_handler.setFormatter(formatter)
+        if rate_limit is not None:
+            # Dropped before they are queued, so suppressed records cost almost nothing
+            for handler in handlers:
+                handler.addFilter(RateLimitFilter(*rate_limit))
 
         # Configure the root logger
-        logging.basicConfig(level=logging.INFO, handlers=[console_handler, file_handler])
+        logging.basicConfig(level=logging.INFO, handlers=handlers)
+        return listener
+
+
+def _reset_root_logger(listener):
+    if listener is not None:
+        atexit.unregister(listener.stop)
+        listener.stop()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+
+
+def benchmark(calls, json_format=False):
+    ''' per-call cost of logging.info in the calling thread, synchronous vs queued handlers '''
+    modes = {
+        'sync': {'queued': False},
+        'queued': {'queued': True},
+        'queued+rate limit': {'queued': True, 'rate_limit': (100.0, 100)},
+    }
+    print(f"{'mode':>18}{'calls':>10}{'us/call':>10}{'drain s':>10}")
+    with tempfile.TemporaryDirectory() as log_dir:
+        for name, options in modes.items():
+            path = os.path.join(log_dir, f"{name.replace(' ', '_').replace('+', '_')}.log")
+            listener = LoggingConfig.setup_logging(path, json_format=json_format, console=False, **options)
+            start_time = time.perf_counter()
+            for index in range(calls):
+                logging.info(f"Processed batch {index} with {index * 10} rows")
+            elapsed = time.perf_counter() - start_time
+            # Time until the background thread has written everything
+            drain_start = time.perf_counter()
+            _reset_root_logger(listener)
+            drained = time.perf_counter() - drain_start
+            print(f"{name:>18}{calls:>10}{elapsed / calls * 1e6:>10.2f}{drained:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Measure the per-call overhead of the logging modes.')
+    parser.add_argument('--calls', type=int, default=100_000)
+    parser.add_argument('--json', action='store_true', help='use the JSON formatter')
+    args = parser.parse_args()
+
+    benchmark(args.calls, args.json)
@@ -0,0 +1,132 @@
+# partitioned_extract.py
+import argparse
+import logging
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+ROWS_PER_PARTITION = 500_000
+
+
+def postgres_url(config):
+    return f"postgresql://{config['user']}:{config['password']}@{config['host']}:{config['port']}/{config['dbname']}"
+
+
+@dataclass(frozen=True)
+class PartitionedQuery:
+    ''' a source table read as key ranges in parallel worker processes '''
+    table: str
+    columns: tuple
+    key_column: str
+    workers: int = os.cpu_count()
+    rows_per_partition: int = ROWS_PER_PARTITION
+
+
+def key_statistics(engine, query):
+    sql = f"SELECT MIN({query.key_column}) AS low, MAX({query.key_column}) AS high, COUNT(*) AS row_count FROM {query.table}"
+    stats = pd.read_sql_query(sql, engine).iloc[0]
+    return stats['low'], stats['high'], int(stats['row_count'])
+
+
+def plan_partitions(low, high, row_count, query):
+    ''' split [low, high] into equal-width key ranges, sized so each holds about rows_per_partition rows '''
+    if row_count == 0 or pd.isna(low):
+        return []
+    count = max(query.workers, math.ceil(row_count / query.rows_per_partition))
+
+    # Dates are split on their day number and converted back afterwards
+    is_date = not isinstance(low, (int, np.integer))
+    low_value = pd.Timestamp(low).toordinal() if is_date else int(low)
+    high_value = pd.Timestamp(high).toordinal() if is_date else int(high)
+    count = min(count, high_value - low_value + 1)
+    bounds = np.unique(np.linspace(low_value, high_value + 1, count + 1).astype(np.int64)).tolist()
+    if is_date:
+        bounds = [pd.Timestamp.fromordinal(bound).date() for bound in bounds]
+    # Half-open ranges [start, end); the last one ends just past the maximum key
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def extract_partition(config, query, low, high, output_path=None):
+    ''' worker entry point: read one key range on its own connection '''
+    engine = create_engine(postgres_url(config))
+    try:
+        sql = text(f"SELECT {', '.join(query.columns)} FROM {query.table} "
+                   f"WHERE {query.key_column} >= :low AND {query.key_column} < :high "
+                   f"ORDER BY {query.key_column}")
+        data = pd.read_sql_query(sql, engine, params={'low': low, 'high': high})
+    finally:
+        engine.dispose()
+    if output_path is None:
+        return data
+    data.to_parquet(output_path, index=False)
+    return output_path
+
+
+class PartitionedExtractor:
+    def __init__(self, config):
+        self.config = config
+        self.engine = create_engine(postgres_url(config))
+
+    def _submit_all(self, query, ranges, output_paths):
+        # Keep at most two partitions per worker in flight so a slow consumer bounds memory
+        with ProcessPoolExecutor(max_workers=query.workers) as executor:
+            pending = deque()
+            for index, (low, high) in enumerate(ranges):
+                pending.append(executor.submit(extract_partition, self.config, query, low, high, output_paths[index]))
+                if len(pending) >= 2 * query.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def iter_partitions(self, query):
+        ''' yield the table as DataFrames in key order, read by parallel workers '''
+        low, high, row_count = key_statistics(self.engine, query)
+        ranges = plan_partitions(low, high, row_count, query)
+        logging.info(f"Extracting {row_count} rows of {query.table} in {len(ranges)} partitions with {query.workers} workers")
+        yield from self._submit_all(query, ranges, [None] * len(ranges))
+
+    def extract(self, query):
+        frames = list(self.iter_partitions(query))
+        if not frames:
+            return pd.read_sql_query(f"SELECT {', '.join(query.columns)} FROM {query.table} WHERE 1 = 0", self.engine)
+        return pd.concat(frames, ignore_index=True)
+
+    def extract_to_files(self, query, output_dir):
+        ''' write one Parquet file per key range and return their paths in key order '''
+        os.makedirs(output_dir, exist_ok=True)
+        low, high, row_count = key_statistics(self.engine, query)
+        ranges = plan_partitions(low, high, row_count, query)
+        output_paths = [os.path.join(output_dir, f'{query.table}_part{index:05d}.parquet') for index in range(len(ranges))]
+        return list(self._submit_all(query, ranges, output_paths))
+
+
+def benchmark(config, query, worker_counts):
+    extractor = PartitionedExtractor(config)
+    print(f"{'workers':>8}{'rows':>12}{'seconds':>10}{'rows/sec':>12}")
+    for workers in worker_counts:
+        start_time = time.perf_counter()
+        rows = sum(len(frame) for frame in extractor.iter_partitions(
+            PartitionedQuery(query.table, query.columns, query.key_column, workers, query.rows_per_partition)))
+        elapsed = time.perf_counter() - start_time
+        print(f"{workers:>8}{rows:>12}{elapsed:>10.2f}{rows / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    from config import POSTGRESQL_CONFIG
+
+    parser = argparse.ArgumentParser(description='Benchmark key-range partitioned extraction of the sales table.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='worker counts to compare')
+    parser.add_argument('--key', default='sales_id', help='partitioning key (sales_id or date)')
+    parser.add_argument('--rows-per-partition', type=int, default=ROWS_PER_PARTITION)
+    args = parser.parse_args()
+
+    sales_query = PartitionedQuery('sales', ('sales_id', 'customer_id', 'product_id', 'amount', 'date'),
+                                   args.key, rows_per_partition=args.rows_per_partition)
+    benchmark(POSTGRESQL_CONFIG, sales_query, args.workers)
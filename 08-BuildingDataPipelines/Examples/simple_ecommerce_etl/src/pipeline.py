@@ -1,17 +1,23 @@
 import logging
+from datetime import datetime
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, create_engine, text
 from config import POSTGRESQL_CONFIG, MYSQL_CONFIG
 from logging_config import LoggingConfig
+from validation import Validator, CONSTRAINTS
+from checkpoint import CheckpointStore
+from dtype_planner import DtypePlanner
+from partitioned_extract import PartitionedQuery, PartitionedExtractor, postgres_url
+from change_detection import ChangeDetector, SCD_CONFIG, HASH_COLUMN, row_hashes
 
-# Set up logging
-LoggingConfig.setup_logging('../logs/etl_pipeline.logs')
+# Batch values per IN list when looking up the keys a batch shares with the warehouse
+KEY_CHUNK_SIZE = 1000
 
 
 class Extractor:
     def __init__(self, config):
-        self.engine = create_engine(
-            f"postgresql://{config['user']}:{config['password']}@{config['host']}:{config['port']}/{config['dbname']}")
+        self.config = config
+        self.engine = create_engine(postgres_url(config))
 
     def extract_data(self, query):
         try:
@@ -21,47 +27,98 @@ class Extractor:
             return data
         except Exception as e:
             logging.error(f"Data extraction failed: {str(e)}")
-            print(f"Error during extraction: {str(e)}")
             raise
 
+    def extract_partitioned(self, query):
+        try:
+            logging.info(f"Starting partitioned extraction of {query.table} on {query.key_column}")
+            data = PartitionedExtractor(self.config).extract(query)
+            logging.info("Data extraction completed successfully")
+            return data
+        except Exception as e:
+            logging.error(f"Data extraction failed: {str(e)}")
+            raise
+
+    def extract_tables(self, queries):
+        # One narrow query per source table instead of one wide join, so the dimension
+        # columns are transferred once per customer/product rather than once per sale
+        tables = {}
+        for name, query in queries.items():
+            if isinstance(query, PartitionedQuery):
+                tables[name] = self.extract_partitioned(query)
+            else:
+                tables[name] = self.extract_data(query)
+        return tables
+
 
 class Transformer:
+    def __init__(self):
+        self.dtype_planner = DtypePlanner()
+
     def transform_data(self, data):
+        # Wide joined rows are split into the same three streams the narrow extraction returns
+        sales = data[['sales_id', 'customer_id', 'product_id', 'amount', 'date']]
+        customers = data[['customer_id', 'name', 'email', 'join_date']].drop_duplicates()
+        inventory = data[['product_id', 'product_name', 'quantity', 'price']].drop_duplicates()
+        return self.transform_tables(sales, customers, inventory)
+
+    def transform_tables(self, sales, customers, inventory):
         try:
             logging.info("Starting data transformation")
 
+            # Keep exactly the rows the inner join of sales, customers and inventory would produce
+            sales = sales[sales['customer_id'].isin(customers['customer_id'])
+                          & sales['product_id'].isin(inventory['product_id'])]
+
             # Convert 'date' column to datetime if it's not already
-            if not pd.api.types.is_datetime64_any_dtype(data['date']):
-                data['date'] = pd.to_datetime(data['date'])
+            dates = sales['date']
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates)
+
+            # Create the 'dim_date' dataframe from the distinct dates instead of every sales row
+            unique_dates = pd.Series(dates.unique(), name='date')
+            dim_dates = pd.DataFrame({
+                'date': unique_dates,
+                'year': unique_dates.dt.year,
+                'quarter': unique_dates.dt.quarter,
+                'month': unique_dates.dt.month,
+                'day_of_week': unique_dates.dt.dayofweek + 1,
+                'week_of_year': unique_dates.dt.isocalendar().week,
+            })
 
-            # Example transformation: Convert amount to USD
-            data['amount_usd'] = data['amount'] * 1.1
+            # Create 'dim_customers' dataframe with the customers that have sales
+            dim_customers = customers[customers['customer_id'].isin(sales['customer_id'])]
+            dim_customers = dim_customers[['customer_id', 'name', 'email', 'join_date']].drop_duplicates()
 
-            # Create the 'dim_date' dataframe
-            data['year'] = data['date'].dt.year
-            data['month'] = data['date'].dt.month
-            data['day'] = data['date'].dt.day
-            data['quarter'] = data['date'].dt.quarter
-            data['day_of_week'] = data['date'].dt.dayofweek + 1
-            data['week_of_year'] = data['date'].dt.isocalendar().week
-            dim_dates = data[['date', 'year', 'quarter', 'month', 'day_of_week', 'week_of_year']].drop_duplicates()
-            dim_dates = dim_dates.rename(columns={'date': 'date'})
+            # Create 'dim_inventory' dataframe with the products that have sales
+            dim_inventory = inventory[inventory['product_id'].isin(sales['product_id'])]
+            dim_inventory = dim_inventory[['product_id', 'product_name', 'quantity', 'price']].drop_duplicates()
 
-            # Create 'dim_customers' dataframe
-            dim_customers = data[['customer_id', 'name', 'email', 'join_date']].drop_duplicates()
+            # Create 'fact_sales' dataframe without adding columns to the extracted frame
+            fact_sales = pd.DataFrame({
+                'sales_id': sales['sales_id'],
+                'customer_id': sales['customer_id'],
+                'product_id': sales['product_id'],
+                'amount': sales['amount'],
+                'date': dates,
+                # Example transformation: Convert amount to USD
+                'amount_usd': sales['amount'] * 1.1,
+            })
 
-            # Create 'dim_inventory' dataframe
-            dim_inventory = data[['product_id', 'product_name', 'quantity', 'price']].drop_duplicates()
+            # Store every output with the most compact dtypes that keep its values intact
+            fact_sales = self.dtype_planner.apply(fact_sales, 'fact_sales')
+            dim_customers = self.dtype_planner.apply(dim_customers, 'dim_customer')
+            dim_inventory = self.dtype_planner.apply(dim_inventory, 'dim_inventory')
+            dim_dates = self.dtype_planner.apply(dim_dates, 'dim_date')
 
-            # Create 'fact_sales' dataframe
-            fact_sales = data[['sales_id', 'customer_id', 'product_id', 'amount', 'date', 'amount_usd']]
-            fact_sales = fact_sales.rename(columns={'date': 'date'})
+            # Content hash per dimension row, used to load only the rows that actually changed
+            dim_customers[HASH_COLUMN] = row_hashes(dim_customers, SCD_CONFIG['dim_customer']['attributes'])
+            dim_inventory[HASH_COLUMN] = row_hashes(dim_inventory, SCD_CONFIG['dim_inventory']['attributes'])
 
             logging.info("Data transformation completed successfully")
             return fact_sales, dim_customers, dim_inventory, dim_dates
         except Exception as e:
             logging.error(f"Data transformation failed: {str(e)}")
-            print(f"Error during transformation: {str(e)}")
             raise
 
 
@@ -77,46 +134,172 @@ class Loader:
             logging.info(f"Data load into {table_name} completed successfully")
         except Exception as e:
             logging.error(f"Data load into {table_name} failed: {str(e)}")
-            print(f"Error during loading into {table_name}: {str(e)}")
+            raise
+
+    def fetch_existing_keys(self, table_name, columns, data, where=None):
+        # Warehouse rows that share a value of one of the table's UNIQUE columns with the batch;
+        # looked up in chunks of IN lists instead of reading the whole table
+        frames = []
+        for column in columns:
+            values = data[column].dropna().drop_duplicates()
+            if pd.api.types.is_datetime64_any_dtype(values):
+                values = values.dt.to_pydatetime()
+            values = list(values.tolist() if hasattr(values, 'tolist') else values)
+            query = text(f"SELECT {', '.join(columns)} FROM {table_name} WHERE {column} IN :values"
+                         + (f" AND {where}" if where else "")).bindparams(bindparam('values', expanding=True))
+            for start in range(0, len(values), KEY_CHUNK_SIZE):
+                frames.append(pd.read_sql_query(query, self.engine,
+                                                params={'values': values[start:start + KEY_CHUNK_SIZE]}))
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True).drop_duplicates()
+
+    def fetch_current_hashes(self, table_name, key_column, versioned, keys=None):
+        # All current hashes of the table, or only those of the given keys
+        conditions = ["is_current = 1"] if versioned else []
+        if keys is None:
+            query = f"SELECT {key_column}, {HASH_COLUMN} FROM {table_name}"
+            if conditions:
+                query += f" WHERE {' AND '.join(conditions)}"
+            return pd.read_sql_query(query, self.engine)
+        query = text(f"SELECT {key_column}, {HASH_COLUMN} FROM {table_name} WHERE "
+                     + ' AND '.join(conditions + [f"{key_column} IN :keys"]))
+        query = query.bindparams(bindparam('keys', expanding=True))
+        keys = [int(key) for key in pd.unique(keys)]
+        frames = [pd.read_sql_query(query, self.engine, params={'keys': keys[start:start + KEY_CHUNK_SIZE]})
+                  for start in range(0, len(keys), KEY_CHUNK_SIZE)]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=[key_column, HASH_COLUMN])
+
+    def load_dimension(self, new_rows, changed_rows, table_name, key_column, scd_type):
+        try:
+            logging.info(f"Starting SCD type {scd_type} load into {table_name}")
+            # Updates and inserts of one dimension commit together or not at all
+            with self.engine.begin() as connection:
+                if scd_type == 1:
+                    if len(changed_rows):
+                        columns = [column for column in changed_rows.columns if column != key_column]
+                        assignments = ', '.join(f"{column} = :{column}" for column in columns)
+                        records = changed_rows.astype(object).where(changed_rows.notna(), None).to_dict('records')
+                        connection.execute(text(f"UPDATE {table_name} SET {assignments} WHERE {key_column} = :{key_column}"), records)
+                    new_rows.to_sql(table_name, connection, if_exists='append', index=False)
+                else:
+                    now = datetime.now()
+                    if len(changed_rows):
+                        records = [{'now': now, 'key': int(key)} for key in changed_rows[key_column]]
+                        connection.execute(text(f"UPDATE {table_name} SET valid_to = :now, is_current = 0 "
+                                                f"WHERE {key_column} = :key AND is_current = 1"), records)
+                    versions = pd.concat([new_rows, changed_rows]).assign(valid_from=now, valid_to=None, is_current=1)
+                    versions.to_sql(table_name, connection, if_exists='append', index=False)
+            logging.info(f"Data load into {table_name} completed successfully: "
+                         f"{len(new_rows)} inserted, {len(changed_rows)} {'updated' if scd_type == 1 else 'versioned'}")
+        except Exception as e:
+            logging.error(f"Data load into {table_name} failed: {str(e)}")
             raise
 
 
 class ETL:
-    def __init__(self, extract_query):
+    def __init__(self, extract_queries):
         self.extractor = Extractor(POSTGRESQL_CONFIG)
         self.transformer = Transformer()
         self.loader = Loader(MYSQL_CONFIG)
-        self.extract_query = extract_query
+        self.validator = Validator('../quarantine')
+        self.change_detector = ChangeDetector('../state', self.loader)
+        self.extract_queries = extract_queries
+        self.checkpoint_dir = '../checkpoints'
+
+    def validate_and_load(self, data, table_name, run_id=None):
+        # Rows loaded by an earlier run are skipped, rows that would violate a warehouse constraint
+        # are quarantined instead of failing the load
+        existing_keys = self.loader.fetch_existing_keys(table_name, CONSTRAINTS[table_name]['unique'], data)
+        valid_rows = self.validator.validate(data, table_name, existing_keys, run_id)
+        self.loader.load_data(valid_rows, table_name)
+
+    def load_dimension_changes(self, data, table_name, run_id=None):
+        # Only rows whose content hash differs from the warehouse's current version are written
+        scd = SCD_CONFIG[table_name]
+        key_column = scd['key']
+        new_rows, changed_rows = self.change_detector.split(data, table_name)
+
+        # Changed rows replace their own current version, so their keys are not duplicates
+        unique_columns = list(dict.fromkeys([key_column] + CONSTRAINTS[table_name]['unique']))
+        batch = pd.concat([new_rows, changed_rows])
+        existing_keys = self.loader.fetch_existing_keys(table_name, unique_columns, batch,
+                                                        'is_current = 1' if scd['type'] == 2 else None)
+        existing_keys = existing_keys[~existing_keys[key_column].isin(changed_rows[key_column])]
+        valid_rows = self.validator.validate(batch, table_name, existing_keys, run_id)
+
+        is_new = valid_rows[key_column].isin(new_rows[key_column])
+        self.loader.load_dimension(valid_rows[is_new], valid_rows[~is_new], table_name, key_column, scd['type'])
+        self.change_detector.commit(valid_rows, table_name)
 
     def run(self):
         try:
-            data = self.extractor.extract_data(self.extract_query)
-            fact_sales, dim_customers, dim_inventory, dim_dates = self.transformer.transform_data(data)
+            # Stages completed by an earlier failed run are read back from their checkpoints
+            checkpoints = CheckpointStore(self.checkpoint_dir, repr(sorted(self.extract_queries.items())))
+
+            if checkpoints.is_done('extract'):
+                logging.info("Skipping extraction, using checkpointed data")
+                extracted = {name: checkpoints.load_frame(f'extracted_{name}') for name in self.extract_queries}
+            else:
+                extracted = self.extractor.extract_tables(self.extract_queries)
+                for name, frame in extracted.items():
+                    checkpoints.save_frame(f'extracted_{name}', frame)
+                checkpoints.mark_done('extract')
 
-            # Load dimension tables
-            self.loader.load_data(dim_customers, 'dim_customer')
-            self.loader.load_data(dim_inventory, 'dim_inventory')
-            self.loader.load_data(dim_dates, 'dim_date')
+            # Dimension tables first, then the fact table
+            table_names = ['dim_customer', 'dim_inventory', 'dim_date', 'fact_sales']
+            if checkpoints.is_done('transform'):
+                logging.info("Skipping transformation, using checkpointed data")
+                tables = {table_name: checkpoints.load_frame(table_name) for table_name in table_names}
+            else:
+                fact_sales, dim_customers, dim_inventory, dim_dates = self.transformer.transform_tables(
+                    extracted['sales'], extracted['customers'], extracted['inventory'])
+                tables = dict(zip(table_names, [dim_customers, dim_inventory, dim_dates, fact_sales]))
+                for table_name, frame in tables.items():
+                    checkpoints.save_frame(table_name, frame)
+                checkpoints.mark_done('transform')
 
-            # Load fact table
-            self.loader.load_data(fact_sales, 'fact_sales')
+            for table_name, frame in tables.items():
+                stage = f'load:{table_name}'
+                if checkpoints.is_done(stage):
+                    logging.info(f"Skipping {table_name}, it was loaded by the previous run")
+                    continue
+                if table_name in SCD_CONFIG:
+                    self.load_dimension_changes(frame, table_name, checkpoints.run_id)
+                else:
+                    self.validate_and_load(frame, table_name, checkpoints.run_id)
+                checkpoints.mark_done(stage)
 
+            checkpoints.clear()
             logging.info("ETL pipeline executed successfully")
-            print("ETL pipeline executed successfully")
         except Exception as e:
             logging.error(f"ETL pipeline failed: {str(e)}")
-            print(f"ETL pipeline failed: {str(e)}")
 
 
 if __name__ == "__main__":
-    # Define your ETL process
-    extract_query = """
-    SELECT s.sales_id, s.customer_id, s.product_id, s.amount, s.date, c.name, c.email, c.join_date, p.product_name, p.quantity, p.price
-    FROM sales s
-    JOIN customers c ON s.customer_id = c.customer_id
-    JOIN inventory p ON s.product_id = p.product_id;
-    """
+    # Set up logging: records are written by a background thread, repeated per-batch messages are rate limited
+    LoggingConfig.setup_logging('../logs/etl_pipeline.logs', rate_limit=(10.0, 20))
+
+    # Define your ETL process: the narrow sales rows plus the customers and products they reference
+    # The large sales table is read as sales_id ranges by parallel worker processes
+    extract_queries = {
+        'sales': PartitionedQuery(
+            table='sales',
+            columns=('sales_id', 'customer_id', 'product_id', 'amount', 'date'),
+            key_column='sales_id',
+        ),
+        'customers': """
+        SELECT c.customer_id, c.name, c.email, c.join_date
+        FROM customers c
+        WHERE c.customer_id IN (SELECT customer_id FROM sales);
+        """,
+        'inventory': """
+        SELECT p.product_id, p.product_name, p.quantity, p.price
+        FROM inventory p
+        WHERE p.product_id IN (SELECT product_id FROM sales);
+        """,
+    }
 
     # Create and run the ETL process
-    etl_pipeline = ETL(extract_query)
+    etl_pipeline = ETL(extract_queries)
     etl_pipeline.run()
@@ -0,0 +1,135 @@
+# validation.py
+import logging
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Constraints declared in scripts/mysql_dw.sql, checked before a batch reaches the warehouse.
+# 'key' identifies a row: rows whose key is already in the warehouse were loaded by an earlier run.
+# 'checks' maps the SQL CHECK text to (column, vectorized predicate that is True for valid values).
+CONSTRAINTS = {
+    'dim_customer': {
+        'key': 'customer_id',
+        'not_null': ['customer_id', 'name', 'email', 'join_date'],
+        'unique': ['customer_id', 'email'],
+        'max_length': {'name': 255, 'email': 255},
+        'checks': {},
+    },
+    'dim_inventory': {
+        'key': 'product_id',
+        'not_null': ['product_id', 'product_name', 'quantity', 'price'],
+        'unique': ['product_id'],
+        'max_length': {'product_name': 255},
+        'checks': {
+            'quantity >= 0': ('quantity', lambda values: values >= 0),
+            'price >= 0': ('price', lambda values: values >= 0),
+        },
+    },
+    'dim_date': {
+        'key': 'date',
+        'not_null': ['date', 'year', 'quarter', 'month', 'day_of_week', 'week_of_year'],
+        'unique': ['date'],
+        'max_length': {},
+        'checks': {
+            'quarter BETWEEN 1 AND 4': ('quarter', lambda values: values.between(1, 4)),
+            'month BETWEEN 1 AND 12': ('month', lambda values: values.between(1, 12)),
+            'day_of_week BETWEEN 1 AND 7': ('day_of_week', lambda values: values.between(1, 7)),
+            'week_of_year BETWEEN 1 AND 53': ('week_of_year', lambda values: values.between(1, 53)),
+        },
+    },
+    'fact_sales': {
+        'key': 'sales_id',
+        'not_null': ['sales_id', 'customer_id', 'product_id', 'amount', 'amount_usd', 'date'],
+        'unique': ['sales_id'],
+        'max_length': {},
+        'checks': {
+            'amount > 0': ('amount', lambda values: values > 0),
+            'amount_usd > 0': ('amount_usd', lambda values: values > 0),
+        },
+    },
+}
+
+
+class Validator:
+    def __init__(self, quarantine_dir, constraints=None):
+        self.quarantine_dir = quarantine_dir
+        self.constraints = constraints or CONSTRAINTS
+
+    @staticmethod
+    def _comparable(values, like):
+        # MySQL returns DATE columns as datetime.date, the batch holds Timestamps
+        if pd.api.types.is_datetime64_any_dtype(like):
+            return pd.to_datetime(pd.Series(values), format='mixed')
+        return pd.Series(values)
+
+    def already_loaded(self, data, table_name, existing_keys=None):
+        ''' True for rows whose key is already in the warehouse '''
+        key_column = self.constraints[table_name]['key']
+        if existing_keys is None or key_column not in existing_keys:
+            return np.zeros(len(data), dtype=bool)
+        existing = self._comparable(existing_keys[key_column], data[key_column])
+        return data[key_column].isin(existing).to_numpy()
+
+    def violation_masks(self, data, table_name, existing_keys=None):
+        ''' one boolean column per rule, True where the row violates it '''
+        rules = self.constraints[table_name]
+        key_column = rules['key']
+        masks = {}
+        for column in rules['not_null']:
+            masks[f'{column} NOT NULL'] = data[column].isna().to_numpy()
+        for column, max_length in rules['max_length'].items():
+            too_long = data[column].astype('string').str.len() > max_length
+            masks[f'LENGTH({column}) <= {max_length}'] = too_long.fillna(False).to_numpy(dtype=bool)
+        for name, (column, predicate) in rules['checks'].items():
+            # NULLs are reported by the NOT NULL rule, not by the CHECK
+            values = data[column]
+            masks[name] = ((~predicate(values)).fillna(False) & values.notna()).to_numpy(dtype=bool)
+        for column in rules['unique']:
+            # Keep the first occurrence in the batch, like a sequential insert would
+            duplicated = data[column].duplicated(keep='first').to_numpy()
+            if existing_keys is not None and column != key_column and column in existing_keys:
+                # A value the warehouse already holds for a different key
+                existing = pd.DataFrame({column: self._comparable(existing_keys[column], data[column]),
+                                         key_column: self._comparable(existing_keys[key_column], data[key_column])})
+                taken = data[column].isin(existing[column]).to_numpy()
+                same_row = pd.MultiIndex.from_frame(data[[column, key_column]]).isin(
+                    pd.MultiIndex.from_frame(existing[[column, key_column]]))
+                duplicated = duplicated | (taken & ~same_row)
+            masks[f'UNIQUE ({column})'] = duplicated
+        return pd.DataFrame(masks, index=data.index)
+
+    def validate(self, data, table_name, existing_keys=None, run_id=None):
+        ''' split a batch into rows that satisfy every constraint and rows written to quarantine;
+        rows an earlier run already loaded are skipped '''
+        loaded = self.already_loaded(data, table_name, existing_keys)
+        if loaded.any():
+            logging.info(f"Skipping {int(loaded.sum())} rows of {table_name} already in the warehouse")
+            data = data[~loaded]
+        masks = self.violation_masks(data, table_name, existing_keys)
+        invalid = masks.any(axis=1).to_numpy()
+        valid_rows = data[~invalid]
+        if invalid.any():
+            self.quarantine(data[invalid], masks[invalid], table_name, run_id)
+        logging.info(f"Validated {table_name}: {len(valid_rows)} valid rows, {int(invalid.sum())} quarantined")
+        return valid_rows
+
+    def quarantine(self, rows, masks, table_name, run_id=None):
+        os.makedirs(self.quarantine_dir, exist_ok=True)
+        # Build the list of failed rules per row column by column instead of row by row
+        reasons = np.full(len(rows), '', dtype=object)
+        for name in masks.columns:
+            reasons = reasons + np.where(masks[name].to_numpy(), f'{name}; ', '')
+        quarantined = rows.assign(violations=[reason.rstrip('; ') for reason in reasons])
+
+        if run_id is not None:
+            # A resumed run validates the same batch again and replaces its own file instead of adding one
+            path = os.path.join(self.quarantine_dir, f'{table_name}_{run_id}.csv')
+            quarantined.to_csv(path, index=False)
+        else:
+            timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+            path = os.path.join(self.quarantine_dir, f'{table_name}_{timestamp}.csv')
+            quarantined.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+        logging.warning(f"Quarantined {len(rows)} rows of {table_name} into {path}")
+        return path
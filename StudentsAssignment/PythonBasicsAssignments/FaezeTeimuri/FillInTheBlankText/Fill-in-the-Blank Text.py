@@ -1,39 +1,23 @@
 import random
-import csv
-csv_file_path = 'Noun.csv'
-with open(csv_file_path, 'r') as file:
-    csv_reader = csv.reader(file)
-    noun = []
-    for row in csv_reader:
-        noun.append(row)
-csv_file_path = 'Adverb.csv'
-with open(csv_file_path, 'r') as file:
-    csv_reader = csv.reader(file)
-    adverb = []
-    for row in csv_reader:
-        adverb.append(row)
-csv_file_path = 'Verb.csv'
-with open(csv_file_path, 'r') as file:
-    csv_reader = csv.reader(file)
-    verb = []
-    for row in csv_reader:
-        verb.append(row)
-csv_file_path = 'Adjective.csv'
-with open(csv_file_path, 'r') as file:
-    csv_reader = csv.reader(file)
-    adjective = []
-    for row in csv_reader:
-        adjective.append(row)
+from word_bank import WordBank
 
-noun.append(input("Enter a noun:"))
-adverb.append(input("Enter an adverb:"))
-verb.append(input("Enter a verb:"))
-adjective.append(input("Enter an adjective:"))
+# Word banks are compiled once into a memory-mapped cache and rebuilt only when the CSV changes
+noun = WordBank('Noun.csv')
+adverb = WordBank('Adverb.csv')
+verb = WordBank('Verb.csv')
+adjective = WordBank('Adjective.csv')
 
-n = random.choice(noun)
-a = random.choice(adverb)
-v = random.choice(verb)
-ad = random.choice(adjective)
+
+def pick(bank, user_word):
+    ''' choose uniformly among the bank words and the word the user entered '''
+    index = random.randrange(len(bank) + 1)
+    return user_word if index == len(bank) else bank[index]
+
+
+n = pick(noun, input("Enter a noun:"))
+a = pick(adverb, input("Enter an adverb:"))
+v = pick(verb, input("Enter a verb:"))
+ad = pick(adjective, input("Enter an adjective:"))
 
 print(n)
 print(a)
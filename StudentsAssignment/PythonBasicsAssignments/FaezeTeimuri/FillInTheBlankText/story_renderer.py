@@ -0,0 +1,149 @@
+import argparse
+import time
+from string import Template
+
+from word_bank import WordBank
+
+# Same story as the interactive fill-in-the-blank game, written as a string.Template
+DEFAULT_TEMPLATE = (
+    "Yesterday, I woke up feeling very $adjective1. "
+    "I decided to make myself a delicious breakfast of $noun1 and $noun2. "
+    "While I was eating, a $noun3 flew right by my window! "
+    "I chased it outside as fast as my $body_part could go, "
+    "but it disappeared into the $place. "
+    "The rest of the day was pretty uneventful, but it was definitely an $adjective2 morning!"
+)
+
+# Which word bank fills each slot of the default template
+DEFAULT_BANKS = {
+    'adjective1': 'Adjective.csv',
+    'adjective2': 'Adjective.csv',
+    'noun1': 'Noun.csv',
+    'noun2': 'Noun.csv',
+    'noun3': 'Noun.csv',
+    'body_part': 'Noun.csv',
+    'place': 'Noun.csv',
+}
+
+BATCH_SIZE = 10_000
+BUFFER_SIZE = 1 << 20  # characters held in memory before flushing to the file
+
+
+class CompiledTemplate:
+    ''' a string.Template parsed once into literal text and an ordered slot list '''
+
+    def __init__(self, template_text):
+        self.slots = []
+        parts = []
+        position = 0
+        for match in Template.pattern.finditer(template_text):
+            parts.append(self._escape(template_text[position:match.start()]))
+            position = match.end()
+            if match.group('escaped') is not None:
+                parts.append('$')
+                continue
+            name = match.group('named') or match.group('braced')
+            if name is None:
+                raise ValueError(f'Invalid placeholder in template at index {match.start()}')
+            if name not in self.slots:
+                self.slots.append(name)
+            parts.append('{' + str(self.slots.index(name)) + '}')
+        parts.append(self._escape(template_text[position:]))
+        # str.format with positional fields is the fastest way to splice the slot values in
+        self._format = ''.join(parts).format
+
+    @staticmethod
+    def _escape(literal):
+        return literal.replace('{', '{{').replace('}', '}}')
+
+    def render(self, values):
+        return self._format(*(values[slot] for slot in self.slots))
+
+    def render_columns(self, columns):
+        ''' yield one rendered story per row of the columnar word arrays '''
+        missing = [slot for slot in self.slots if slot not in columns]
+        if missing:
+            raise KeyError(f'No column for template slots: {", ".join(missing)}')
+        render = self._format
+        for row in zip(*(columns[slot] for slot in self.slots)):
+            yield render(*row)
+
+
+def random_columns(compiled, banks, count, batch_size=BATCH_SIZE):
+    ''' yield batches of columns sampled from the word bank assigned to each slot '''
+    remaining = count
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        yield {slot: banks[slot].sample(size) for slot in compiled.slots}
+        remaining -= size
+
+
+def render_to_file(compiled, column_batches, output_path, buffer_size=BUFFER_SIZE, separator='\n'):
+    ''' stream rendered stories to a file, holding at most about buffer_size characters in memory '''
+    rendered = 0
+    start_time = time.perf_counter()
+    with open(output_path, 'w', encoding='utf-8') as file:
+        buffer = []
+        buffered = 0
+        for columns in column_batches:
+            for story in compiled.render_columns(columns):
+                buffer.append(story)
+                buffer.append(separator)
+                buffered += len(story) + len(separator)
+                rendered += 1
+                if buffered >= buffer_size:
+                    file.write(''.join(buffer))
+                    buffer.clear()
+                    buffered = 0
+        file.write(''.join(buffer))
+    elapsed = time.perf_counter() - start_time
+    return rendered, elapsed
+
+
+def parse_bank_options(bank_options):
+    banks = dict(DEFAULT_BANKS)
+    for option in bank_options:
+        slot, _, csv_path = option.partition('=')
+        if not csv_path:
+            raise ValueError(f'Expected SLOT=CSV for --bank, got: {option}')
+        banks[slot] = csv_path
+    return banks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render fill-in-the-blank stories in bulk from the word banks.')
+    parser.add_argument('--count', type=int, default=1_000_000, help='number of stories to render')
+    parser.add_argument('--output', default='stories.txt', help='file the stories are written to')
+    parser.add_argument('--template', help='file holding a string.Template story (defaults to the built-in story)')
+    parser.add_argument('--bank', action='append', default=[], metavar='SLOT=CSV',
+                        help='word bank CSV used for a template slot (repeatable)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='stories sampled per batch')
+    args = parser.parse_args()
+
+    if args.template:
+        with open(args.template, 'r', encoding='utf-8') as file:
+            compiled = CompiledTemplate(file.read())
+    else:
+        compiled = CompiledTemplate(DEFAULT_TEMPLATE)
+
+    bank_paths = parse_bank_options(args.bank)
+    missing = [slot for slot in compiled.slots if slot not in bank_paths]
+    if missing:
+        parser.error(f'no word bank for slots: {", ".join(missing)}')
+
+    # Slots that share a CSV share one opened word bank
+    opened = {path: WordBank(path) for path in {bank_paths[slot] for slot in compiled.slots}}
+    banks = {slot: opened[bank_paths[slot]] for slot in compiled.slots}
+    try:
+        batches = random_columns(compiled, banks, args.count, args.batch_size)
+        rendered, elapsed = render_to_file(compiled, batches, args.output)
+    finally:
+        for bank in opened.values():
+            bank.close()
+
+    rate = rendered / elapsed if elapsed else float('inf')
+    print(f"Rendered {rendered} stories to {args.output} in {elapsed:.2f}s ({rate:,.0f} stories/sec)")
+
+
+if __name__ == "__main__":
+    main()
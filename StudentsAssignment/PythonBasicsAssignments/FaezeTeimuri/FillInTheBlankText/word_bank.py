@@ -0,0 +1,108 @@
+import csv
+import mmap
+import os
+import random
+import struct
+from array import array
+
+# Cache file layout: header, (count + 1) offsets into the blob, then the UTF-8 blob itself
+MAGIC = b'WBANK001'
+HEADER = struct.Struct('=8sqqQ')  # magic, source mtime_ns, source size, word count
+OFFSET_TYPE = 'Q'
+CACHE_SUFFIX = '.wordbank'
+
+
+def cache_path_for(csv_path):
+    return os.path.splitext(csv_path)[0] + CACHE_SUFFIX
+
+
+def read_words(csv_path):
+    ''' read one word per row, skipping the header row and blank cells '''
+    with open(csv_path, 'r', newline='') as file:
+        csv_reader = csv.reader(file)
+        next(csv_reader, None)
+        for row in csv_reader:
+            if row and row[0].strip():
+                yield row[0].strip()
+
+
+def compile_csv(csv_path, cache_path):
+    ''' compile a word CSV into the offsets + blob cache file '''
+    stat = os.stat(csv_path)
+    offsets = array(OFFSET_TYPE, [0])
+    blob = bytearray()
+    for word in read_words(csv_path):
+        blob += word.encode('utf-8')
+        offsets.append(len(blob))
+
+    # Write to a temporary file first so a reader never sees a half-written cache
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, stat.st_mtime_ns, stat.st_size, len(offsets) - 1))
+        offsets.tofile(file)
+        file.write(blob)
+    os.replace(tmp_path, cache_path)
+
+
+class WordBank:
+    def __init__(self, csv_path, cache_path=None):
+        self.csv_path = csv_path
+        self.cache_path = cache_path or cache_path_for(csv_path)
+        if not self._cache_is_fresh():
+            compile_csv(self.csv_path, self.cache_path)
+        self._open()
+
+    def _cache_is_fresh(self):
+        try:
+            with open(self.cache_path, 'rb') as file:
+                header = file.read(HEADER.size)
+        except FileNotFoundError:
+            return False
+        if len(header) != HEADER.size:
+            return False
+        magic, mtime_ns, size, _ = HEADER.unpack(header)
+        stat = os.stat(self.csv_path)
+        return magic == MAGIC and mtime_ns == stat.st_mtime_ns and size == stat.st_size
+
+    def _open(self):
+        with open(self.cache_path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        _, _, _, self._count = HEADER.unpack_from(self._mmap)
+        offsets_size = (self._count + 1) * struct.calcsize(OFFSET_TYPE)
+        view = memoryview(self._mmap)
+        self._offsets = view[HEADER.size:HEADER.size + offsets_size].cast(OFFSET_TYPE)
+        self._blob = view[HEADER.size + offsets_size:]
+
+    def close(self):
+        self._offsets.release()
+        self._blob.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('word bank index out of range')
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return str(self._blob[start:end], 'utf-8')
+
+    def choice(self, rng=random):
+        ''' pick one word in constant time '''
+        if not self._count:
+            raise IndexError('cannot choose from an empty word bank')
+        return self[rng.randrange(self._count)]
+
+    def sample(self, k, rng=random):
+        ''' pick k words (with replacement); cost depends on k, not on the vocabulary size '''
+        if not self._count:
+            raise IndexError('cannot choose from an empty word bank')
+        return [self[index] for index in rng.choices(range(self._count), k=k)]
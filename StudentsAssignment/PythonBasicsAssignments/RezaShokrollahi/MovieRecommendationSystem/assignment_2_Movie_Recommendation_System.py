@@ -6,6 +6,15 @@
 
 movies = {}
 
+# Called with the movie name after every insert, e.g. to invalidate cached query results
+on_movie_added = []
+
+
+def insert_movie(movie_name, movie_genre, movie_year):
+    movies[movie_name] = {'genre': movie_genre, 'year': movie_year}
+    for callback in on_movie_added:
+        callback(movie_name)
+
 
 def add_movies():
     add_movie = 1
@@ -14,7 +23,7 @@ def add_movies():
         movie_name = input('please enter your movie name: ').lower()
         movie_genre = input('what genre is it? ').lower()
         movie_year = int(input('what year was it produced? '))
-        movies[movie_name] = {'genre': movie_genre, 'year': movie_year}
+        insert_movie(movie_name, movie_genre, movie_year)
         print('movie added succesfully!')
         another_movie = input('Do you want to add another movie [yes/no] ?').lower()
         if another_movie == 'yes':
@@ -68,18 +77,19 @@ def menue_options():
     print('4 - Exit')
 
 
-print('\nHello and welcome to movie recomendation app:')
-while True:
-    menue_options()
-    menue_input = input('\nPlease select a number: ')
-    if menue_input == '1':
-        display_all_movies()
-    elif menue_input == '2':
-        display_genre_movies()
-    elif menue_input == '3':
-        add_movies()
-    elif menue_input == '4':
-        print('good bye!')
-        break
-    else:
-        print('Not a valid option!')
+if __name__ == '__main__':
+    print('\nHello and welcome to movie recomendation app:')
+    while True:
+        menue_options()
+        menue_input = input('\nPlease select a number: ')
+        if menue_input == '1':
+            display_all_movies()
+        elif menue_input == '2':
+            display_genre_movies()
+        elif menue_input == '3':
+            add_movies()
+        elif menue_input == '4':
+            print('good bye!')
+            break
+        else:
+            print('Not a valid option!')
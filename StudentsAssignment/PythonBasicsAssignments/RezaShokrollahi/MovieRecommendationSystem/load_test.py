@@ -0,0 +1,81 @@
+# Load test for movie_service.py: many concurrent clients send a mix of queries and report QPS and latency.
+# Start the service first:  python movie_service.py
+# Needs Python 3.12+, like movie_service.py.
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from movie_service import HOST, PORT, SAMPLE_GENRES
+
+# Genre listings of a large catalog are longer than asyncio's default 64 KiB line limit
+READ_LIMIT = 1 << 24
+
+
+def make_request(rng, add_ratio):
+    if rng.random() < add_ratio:
+        return {'op': 'add', 'name': f'load test movie {rng.getrandbits(32)}',
+                'genre': rng.choice(SAMPLE_GENRES), 'year': rng.randint(1950, 2024)}
+    kind = rng.random()
+    if kind < 0.1:
+        return {'op': 'genres'}
+    if kind < 0.3:
+        return {'op': 'genre', 'genre': rng.choice(SAMPLE_GENRES)}
+    # A limited set of distinct queries, as real traffic repeats itself
+    return {'op': 'recommend', 'genre': rng.choice(SAMPLE_GENRES), 'year': rng.randrange(1950, 2025, 5)}
+
+
+async def client(host, port, requests, add_ratio, seed, latencies):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port, limit=READ_LIMIT)
+    errors = 0
+    for _ in range(requests):
+        start_time = time.perf_counter()
+        writer.write(json.dumps(make_request(rng, add_ratio)).encode() + b'\n')
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - start_time)
+        errors += 'error' in response
+    writer.close()
+    await writer.wait_closed()
+    return errors
+
+
+async def stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"op": "stats"}\n')
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    writer.close()
+    await writer.wait_closed()
+    return response
+
+
+async def run_load_test(host, port, clients, requests, add_ratio):
+    latencies = []
+    start_time = time.perf_counter()
+    errors = await asyncio.gather(*[client(host, port, requests, add_ratio, seed, latencies)
+                                    for seed in range(clients)])
+    elapsed = time.perf_counter() - start_time
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    percentiles = statistics.quantiles(latencies_ms, n=100)
+    print(f'{len(latencies)} requests from {clients} clients in {elapsed:.2f} s, {sum(errors)} errors')
+    print(f'QPS: {len(latencies) / elapsed:,.0f}')
+    print(f'latency ms: p50 {percentiles[49]:.2f}  p95 {percentiles[94]:.2f}  p99 {percentiles[98]:.2f}  '
+          f'max {latencies_ms[-1]:.2f}')
+    print(f'server: {await stats(host, port)}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure QPS and latency of a running movie service.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=200, help='requests per client')
+    parser.add_argument('--add-ratio', type=float, default=0.001, help='share of requests that add a movie')
+    args = parser.parse_args()
+
+    asyncio.run(run_load_test(args.host, args.port, args.clients, args.requests, args.add_ratio))
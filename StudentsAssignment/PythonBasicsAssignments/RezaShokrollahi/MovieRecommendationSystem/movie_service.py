@@ -0,0 +1,241 @@
+# Serves the movie catalog to many clients at once over a line protocol:
+# each request is one JSON object per line, e.g. {"op": "recommend", "genre": "drama", "year": 1990},
+# and each response is one JSON object per line.
+# Needs Python 3.12+, as assignment_2_Movie_Recommendation_System.py nests quotes inside f-strings.
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import pickle
+import random
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from assignment_2_Movie_Recommendation_System import movies, insert_movie, on_movie_added
+
+HOST = '127.0.0.1'
+PORT = 8765
+CACHE_SIZE = 1024
+CACHE_TTL = 60  # seconds
+SAMPLE_GENRES = ['drama', 'fantasy', 'comedy', 'action', 'horror', 'sci-fi', 'romance', 'thriller']
+# Malformed requests get an error response; OverflowError comes from int() of a JSON number like 1e400 (inf)
+REQUEST_ERRORS = (ValueError, KeyError, TypeError, AttributeError, OverflowError)
+
+
+class QueryCache:
+    ''' LRU cache of encoded query responses with a time-to-live, cleared whenever the catalog changes '''
+
+    def __init__(self, max_entries=CACHE_SIZE, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        # Bumped by every invalidation, so a result computed from an older catalog is never stored
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value, version):
+        if version != self.version:
+            return
+        self.entries[key] = (value, time.monotonic() + self.ttl)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, *_):
+        self.entries.clear()
+        self.version += 1
+
+
+def movie_entry(name, info):
+    return {'name': name, 'genre': info['genre'], 'year': info['year']}
+
+
+def score_movies(catalog, genre, year, limit):
+    # A full scan of the catalog; only the best `limit` matches are kept, not the whole catalog sorted
+    def score(item):
+        name, info = item
+        value = 2.0 if info['genre'] == genre else 0.0
+        if year is not None:
+            value += 1.0 / (1.0 + abs(info['year'] - year) / 10.0)
+        return value
+
+    best = heapq.nsmallest(limit, ((-score(item), item[0], item[1]) for item in catalog))
+    return [dict(movie_entry(name, info), score=round(-value, 4)) for value, name, info in best]
+
+
+def run_query(catalog, key):
+    # Runs in the executor, including the JSON encoding, which is the costly part for long genre listings
+    op = key[0]
+    if op == 'genres':
+        result = sorted({info['genre'] for _, info in catalog})
+    elif op == 'genre':
+        result = [movie_entry(name, info) for name, info in catalog if info['genre'] == key[1]]
+    elif op == 'all':
+        result = [movie_entry(name, info) for name, info in catalog]
+    else:
+        result = score_movies(catalog, *key[1:])
+    return json.dumps({'result': result}).encode() + b'\n'
+
+
+# Catalog copy of a process worker, (version, catalog); tasks only carry the version they need
+_worker_snapshot = (-1, None)
+
+
+def write_snapshot(path, version, catalog):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        pickle.dump((version, catalog), file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def run_worker_query(path, version, key):
+    # Runs in a worker process: the catalog is read from the snapshot file once per version, not sent with
+    # every task. The file may already hold a newer version, whose result the cache then simply does not keep
+    global _worker_snapshot
+    if _worker_snapshot[0] < version:
+        with open(path, 'rb') as file:
+            _worker_snapshot = pickle.load(file)
+    return run_query(_worker_snapshot[1], key)
+
+
+def encode(response):
+    return json.dumps(response).encode() + b'\n'
+
+
+class MovieService:
+    def __init__(self, executor, cache, snapshot_path=None):
+        self.executor = executor
+        self.cache = cache
+        # Set when the executor runs worker processes, which read the catalog from this file
+        self.snapshot_path = snapshot_path
+        on_movie_added.append(cache.invalidate)
+        # Queries being computed right now: concurrent identical misses wait for the same result
+        self.pending = {}
+        self.snapshot = (None, None)
+
+    def catalog(self):
+        # One immutable snapshot per catalog version, taken on the event loop where inserts happen too
+        version, catalog = self.snapshot
+        if version != self.cache.version:
+            catalog = list(movies.items())
+            self.snapshot = (self.cache.version, catalog)
+            if self.snapshot_path is not None:
+                write_snapshot(self.snapshot_path, self.cache.version, catalog)
+        return catalog
+
+    async def query(self, request):
+        ''' answer one request with an encoded response line '''
+        op = request.get('op')
+        if op == 'add':
+            name = str(request['name']).lower()
+            insert_movie(name, str(request['genre']).lower(), int(request['year']))
+            return encode({'added': name, 'movies': len(movies)})
+        if op == 'stats':
+            return encode({'movies': len(movies), 'cached': len(self.cache.entries),
+                           'hits': self.cache.hits, 'misses': self.cache.misses})
+
+        if op == 'genres':
+            key = ('genres',)
+        elif op == 'genre':
+            key = ('genre', str(request['genre']).lower())
+        elif op == 'all':
+            key = ('all',)
+        elif op == 'recommend':
+            year = request.get('year')
+            key = ('recommend', str(request.get('genre', '')).lower(),
+                   None if year is None else int(year), int(request.get('limit', 5)))
+        else:
+            raise ValueError(f'unknown op: {op}')
+
+        response = self.cache.get(key)
+        if response is not None:
+            return response
+        pending_key = (self.cache.version, key)
+        if pending_key not in self.pending:
+            self.pending[pending_key] = asyncio.ensure_future(self.compute(key, self.cache.version, self.catalog()))
+        return await asyncio.shield(self.pending[pending_key])
+
+    async def compute(self, key, version, catalog):
+        try:
+            loop = asyncio.get_running_loop()
+            if self.snapshot_path is None:
+                response = await loop.run_in_executor(self.executor, run_query, catalog, key)
+            else:
+                response = await loop.run_in_executor(self.executor, run_worker_query, self.snapshot_path, version, key)
+            self.cache.put(key, response, version)
+            return response
+        finally:
+            del self.pending[(version, key)]
+
+    async def handle_client(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                try:
+                    response = await self.query(json.loads(line))
+                except REQUEST_ERRORS as e:
+                    response = encode({'error': str(e)})
+                writer.write(response)
+                await writer.drain()
+        except ConnectionResetError:
+            pass
+        finally:
+            writer.close()
+
+
+def add_sample_movies(count, seed=0):
+    # The four movies from the assignment, plus synthetic ones for load testing
+    insert_movie('shawshang redemption', 'drama', 1994)
+    insert_movie('harry potter', 'fantasy', 2001)
+    insert_movie('lord of the rings', 'fantasy', 2001)
+    insert_movie('god father', 'drama', 1972)
+    rng = random.Random(seed)
+    for index in range(count):
+        insert_movie(f'movie {index}', rng.choice(SAMPLE_GENRES), rng.randint(1950, 2024))
+
+
+async def serve(host, port, executor, cache, snapshot_path=None):
+    service = MovieService(executor, cache, snapshot_path)
+    server = await asyncio.start_server(service.handle_client, host, port)
+    print(f'movie service listening on {host}:{port} with {len(movies)} movies')
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve movie queries to concurrent clients.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--sample-movies', type=int, default=10_000, help='synthetic movies to start with')
+    parser.add_argument('--workers', type=int, default=4, help='executor workers for scoring')
+    parser.add_argument('--processes', action='store_true', help='score in worker processes instead of threads')
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE)
+    parser.add_argument('--cache-ttl', type=float, default=CACHE_TTL, help='seconds')
+    args = parser.parse_args()
+
+    add_sample_movies(args.sample_movies)
+    executor_type = ProcessPoolExecutor if args.processes else ThreadPoolExecutor
+    snapshot_path = None
+    if args.processes:
+        snapshot_path = os.path.join(tempfile.gettempdir(), f'movie_service_{os.getpid()}.pickle')
+    cache = QueryCache(args.cache_size, args.cache_ttl)
+    with executor_type(max_workers=args.workers) as executor:
+        try:
+            asyncio.run(serve(args.host, args.port, executor, cache, snapshot_path))
+        except KeyboardInterrupt:
+            print('good bye!')
+        finally:
+            if snapshot_path is not None and os.path.exists(snapshot_path):
+                os.remove(snapshot_path)